@@ -0,0 +1,165 @@
+"""
+Benchmarks pairing and standings at scale on synthetic tournaments.
+
+Each field is simulated round by round: pair, play every game with Elo
+probabilities, then recompute standings. The output is JSON so runs from
+different versions can be compared with --compare.
+
+    python benchmarks/bench_pairing.py --sizes 64 1024 5000 --rounds 7
+    python benchmarks/bench_pairing.py --output new.json --compare old.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from chess_tournament import pairing_logic  # noqa: E402
+from chess_tournament.pairing_logic import RESULT_POINTS  # noqa: E402
+from synthetic import make_field, play_game  # noqa: E402
+
+
+def _measure(func, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return value, elapsed, peak
+
+
+def simulate(size, rounds, engine, seed, trace_memory=False):
+    rng = random.Random(seed)
+    players = make_field(size, rng)
+    by_id = {p['SrNo']: p for p in players}
+    history = set()
+    byes = Counter()
+    matches = []
+    report = {'size': size, 'engine': engine, 'rounds': []}
+
+    for round_number in range(1, rounds + 1):
+        if round_number == 1:
+            call = lambda: pairing_logic.generate_first_round_pairs(players)
+        else:
+            call = lambda: pairing_logic.generate_swiss_pairs(players, history, engine=engine, byes=set(byes))
+        pairings, pairing_time, pairing_mem = _measure(call, trace_memory)
+
+        paired = [sr_no for pair in pairings for sr_no in pair if sr_no is not None]
+        rematches = floaters = 0
+        for p1, p2 in pairings:
+            if p2 is None:
+                byes[p1] += 1
+                by_id[p1]['points'] += 1.0
+                continue
+            key = (min(p1, p2), max(p1, p2))
+            rematches += key in history
+            floaters += by_id[p1]['points'] != by_id[p2]['points']
+            history.add(key)
+
+        for p1, p2 in pairings:
+            if p2 is None:
+                continue
+            result = play_game(by_id[p1], by_id[p2], rng)
+            points1, points2 = RESULT_POINTS[result]
+            by_id[p1]['points'] += points1
+            by_id[p2]['points'] += points2
+            matches.append({'player1_SrNo': p1, 'player2_SrNo': p2, 'result': result})
+
+        _, standings_time, standings_mem = _measure(
+            lambda: pairing_logic.calculate_standings_with_tiebreaks(players, matches), trace_memory)
+
+        report['rounds'].append({
+            'round': round_number,
+            'pairing_s': round(pairing_time, 6),
+            'standings_s': round(standings_time, 6),
+            'pairing_peak_bytes': pairing_mem,
+            'standings_peak_bytes': standings_mem,
+            'unpaired': size - len(paired),
+            'rematches': rematches,
+            'floaters': floaters,
+            'byes': sum(1 for _, p2 in pairings if p2 is None),
+        })
+
+    report['total_pairing_s'] = round(sum(r['pairing_s'] for r in report['rounds']), 6)
+    report['total_standings_s'] = round(sum(r['standings_s'] for r in report['rounds']), 6)
+    report['total_rematches'] = sum(r['rematches'] for r in report['rounds'])
+    report['total_floaters'] = sum(r['floaters'] for r in report['rounds'])
+    report['players_with_multiple_byes'] = sum(1 for count in byes.values() if count > 1)
+    return report
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    """Prints timing ratios (new / old) for every size and engine present in both runs."""
+    old_runs = {(r['size'], r['engine']): r for r in old['results']}
+    for run in new['results']:
+        base = old_runs.get((run['size'], run['engine']))
+        if base is None:
+            continue
+        for field in ('total_pairing_s', 'total_standings_s'):
+            ratio = run[field] / base[field] if base[field] else float('inf')
+            print(f"{run['engine']:>8} {run['size']:>6} {field:<18} "
+                  f"{base[field]:>10.4f} -> {run[field]:>10.4f}  x{ratio:.2f}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 256, 1024, 5000])
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--engines', nargs='+', default=sorted(pairing_logic.PAIRING_ENGINES))
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='record tracemalloc peaks per call (slows the timed calls)')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    parser.add_argument('--compare', help='earlier JSON output to compare timings against')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        for engine in args.engines:
+            results.append(simulate(size, args.rounds, engine, args.seed, args.trace_memory))
+            print(f"{engine:>8} {size:>6} players: pairing {results[-1]['total_pairing_s']:.3f}s, "
+                  f"standings {results[-1]['total_standings_s']:.3f}s", file=sys.stderr)
+
+    output = {
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'rounds': args.rounds,
+        'seed': args.seed,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'results': results,
+    }
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), output)
+
+
+if __name__ == '__main__':
+    main()
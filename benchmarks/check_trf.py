@@ -0,0 +1,103 @@
+"""
+Replays FIDE TRF files through the Swiss pairing engine and reports where
+its pairings differ from the files'.
+
+Every round from --first-round on is paired from the file's earlier rounds
+(only the players present in that round take part) and compared board by
+board with the file, ignoring colours. Directories are searched for *.trf
+and *.txt files, and each file is read line by line, so thousands of
+archived tournaments can be checked in one run. The output is JSON, like
+bench_pairing.py.
+
+    python benchmarks/check_trf.py archive/ --engine matching
+    python benchmarks/check_trf.py a.trf b.trf --output check.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from chess_tournament import pairing_logic, trf  # noqa: E402
+
+
+def _iter_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(('.trf', '.txt')):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def check_file(path, engine, first_round):
+    with open(path, encoding='utf-8-sig', errors='replace') as f:
+        _, players = trf.read_trf(f)
+    rounds = trf.check_pairings(players, engine=engine, first_round=first_round)
+    return {
+        'file': path,
+        'players': len(players),
+        'rounds_checked': len(rounds),
+        'boards': sum(r['boards'] for r in rounds),
+        'same': sum(r['same'] for r in rounds),
+        'identical_rounds': sum(1 for r in rounds if r['same'] == r['boards']),
+        'pairing_s': round(sum(r['seconds'] for r in rounds), 6),
+        'rounds': rounds,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('paths', nargs='+', help='TRF files or directories of them')
+    parser.add_argument('--engine', default='matching', choices=sorted(pairing_logic.PAIRING_ENGINES))
+    parser.add_argument('--first-round', type=int, default=2,
+                        help='first round to replay (round 1 is paired at random by the app)')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = []
+    errors = []
+    started = time.perf_counter()
+    for path in _iter_files(args.paths):
+        try:
+            result = check_file(path, args.engine, args.first_round)
+        except (OSError, ValueError) as e:
+            errors.append({'file': path, 'error': str(e)})
+            print(f'{path}: {e}', file=sys.stderr)
+            continue
+        results.append(result)
+        print(f"{path}: {result['players']} players, {result['same']}/{result['boards']} boards and "
+              f"{result['identical_rounds']}/{result['rounds_checked']} rounds identical, "
+              f"pairing {result['pairing_s']:.3f}s", file=sys.stderr)
+
+    boards = sum(r['boards'] for r in results)
+    output = {
+        'python': platform.python_version(),
+        'engine': args.engine,
+        'first_round': args.first_round,
+        'files': len(results),
+        'failed_files': errors,
+        'boards': boards,
+        'same_boards': sum(r['same'] for r in results),
+        'board_agreement': round(sum(r['same'] for r in results) / boards, 4) if boards else None,
+        'identical_rounds': sum(r['identical_rounds'] for r in results),
+        'rounds_checked': sum(r['rounds_checked'] for r in results),
+        'pairing_s': round(sum(r['pairing_s'] for r in results), 6),
+        'elapsed_s': round(time.perf_counter() - started, 3),
+        'results': results,
+    }
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
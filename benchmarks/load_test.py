@@ -0,0 +1,344 @@
+"""
+Load-tests the web app with concurrent arbiters and spectators.
+
+A realistic tournament (several events, each with a synthetic field and a
+few rounds already played) is seeded into a temporary database through
+create_app(test_config). The app is then served from a separate process and
+driven by client threads for a fixed duration:
+
+  spectators  GET /pairings?section=..., revalidating with the ETag like a browser
+  arbiters    POST /record-result for the boards of their event's current
+              round; the arbiter who enters the last result POSTs
+              /generate-pairings, and once --rounds are paired they keep
+              correcting results
+
+Each request type is reported with p50/p95/p99 latency, throughput, its error
+rate and its "database is locked" rate (the server answers those with 503 so
+they can be told apart from other failures). The output is JSON, like
+bench_pairing.py.
+
+    python benchmarks/load_test.py --spectators 50 --arbiters 2 --events 4 --duration 30
+    python benchmarks/load_test.py --server-processes 4 --output load.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+from chess_tournament import create_app, db, pairing_logic  # noqa: E402
+from synthetic import make_field, play_game  # noqa: E402
+
+USERNAME = 'arbiter'
+PASSWORD = 'load-test'
+RESULTS = ('1-0', '0-1', '0.5-0.5')
+
+
+def _make_app(workdir):
+    app = create_app({
+        'DATABASE': os.path.join(workdir, 'tournament.sqlite'),
+        'SECRET_KEY': 'load-test',
+    })
+    # Page-cache version files go with the temporary database too
+    app.instance_path = workdir
+    return app
+
+
+def seed(workdir, events, players, played_rounds, rng):
+    """Creates the events with a played history and a pending round. Returns {event_id: section_id}."""
+    app = _make_app(workdir)
+    sections = {}
+    with app.app_context():
+        db.init_db()
+        conn = db.get_db()
+        conn.execute('INSERT INTO user (username, password) VALUES (?, ?)',
+                     (USERNAME, generate_password_hash(PASSWORD)))
+        conn.commit()
+        for e in range(events):
+            event_id, (section_id,) = db.create_event_in_db(f'Load Test {e + 1}', ['Open'], ('buchholz',))
+            sections[event_id] = section_id
+            field = make_field(players, rng)
+            db.add_players_to_db(section_id, [(i, p['name'], p['rating']) for i, p in enumerate(field, 1)])
+            for round_number in range(1, played_rounds + 2):
+                state = db.get_tournament_state(section_id)
+                if round_number == 1:
+                    pairings = pairing_logic.generate_first_round_pairs(state)
+                else:
+                    pairings = pairing_logic.generate_swiss_pairs(state, engine='greedy')
+                db.add_round_to_db(section_id, pairings, round_number)
+                if round_number > played_rounds:
+                    break  # the last round stays pending for the arbiters
+                ratings = {p['SrNo']: p for p in db.get_all_players_from_db(section_id)}
+                db.record_results_in_db(section_id, [
+                    (board['Table_No'], play_game(ratings[board['player1_SrNo']], ratings[board['player2_SrNo']], rng))
+                    for board in db.get_current_pairings_from_db(section_id) if board['player2_SrNo'] is not None
+                ])
+    return sections
+
+
+def serve(workdir, port_queue, threaded, processes):
+    """Runs in the server process."""
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = _make_app(workdir)
+
+    @app.errorhandler(sqlite3.OperationalError)
+    def database_error(error):
+        return str(error), 503
+
+    server = make_server('127.0.0.1', 0, app, threaded=threaded, processes=processes)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.locked = defaultdict(int)
+
+    def record(self, kind, seconds, status, body):
+        with self.lock:
+            self.latencies[kind].append(seconds)
+            if status >= 400:
+                self.errors[kind] += 1
+                if b'database is locked' in body:
+                    self.locked[kind] += 1
+
+    def report(self, duration):
+        report = {}
+        for kind, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            count = len(latencies)
+
+            def percentile(p):
+                return round(latencies[min(count - 1, int(p / 100 * count))] * 1000, 2)
+
+            report[kind] = {
+                'requests': count,
+                'throughput_rps': round(count / duration, 1),
+                'p50_ms': percentile(50),
+                'p95_ms': percentile(95),
+                'p99_ms': percentile(99),
+                'max_ms': round(latencies[-1] * 1000, 2),
+                'error_rate': round(self.errors[kind] / count, 4),
+                'locked_rate': round(self.locked[kind] / count, 4),
+            }
+        return report
+
+
+class Client:
+    """One virtual user: a keep-alive connection and the Flask session cookie."""
+
+    def __init__(self, port, stats):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        self.stats = stats
+        self.cookie = None
+
+    def request(self, kind, method, path, form=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.connection.close()
+            if kind is not None:
+                self.stats.record(kind, time.perf_counter() - start, 599, str(e).encode())
+            return 599, {}, b''
+        elapsed = time.perf_counter() - start
+        if kind is not None:
+            self.stats.record(kind, elapsed, response.status, data)
+        cookie = response.getheader('Set-Cookie')
+        if cookie and cookie.startswith('session='):
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status, dict(response.getheaders()), data
+
+
+class EventBoards:
+    """The current round's boards of one event, shared by its arbiters."""
+
+    def __init__(self, database, section_id):
+        self.lock = threading.Lock()
+        self.database = database
+        self.section_id = section_id
+        self.round_number = 0
+        self.boards = []
+        self.pending = []
+        self.in_flight = 0
+        self.generating = False
+        self.refresh()
+
+    def refresh(self):
+        conn = sqlite3.connect(f'file:{self.database}?mode=ro', uri=True, timeout=30)
+        try:
+            rows = conn.execute('''
+                SELECT round_number, Table_No, result FROM pairings
+                WHERE section_id = ?1 AND player2_SrNo IS NOT NULL
+                  AND round_number = (SELECT MAX(round_number) FROM pairings WHERE section_id = ?1)
+            ''', (self.section_id,)).fetchall()
+        finally:
+            conn.close()
+        with self.lock:
+            self.round_number = rows[0][0] if rows else 0
+            self.boards = [table_no for _, table_no, _ in rows]
+            self.pending = [table_no for _, table_no, result in rows if result == 'pending']
+            random.shuffle(self.pending)
+
+
+def spectator(client, section_ids, deadline, think_time):
+    etags = {}
+    while time.monotonic() < deadline:
+        section_id = random.choice(section_ids)
+        headers = {'If-None-Match': etags[section_id]} if section_id in etags else {}
+        status, response_headers, _ = client.request('spectator /pairings', 'GET',
+                                                     f'/pairings?section={section_id}', headers=headers)
+        if status == 200 and 'ETag' in response_headers:
+            etags[section_id] = response_headers['ETag']
+        if think_time:
+            time.sleep(random.uniform(0, 2 * think_time))
+
+
+def arbiter(client, event_id, boards, deadline, max_rounds, think_time):
+    client.request(None, 'POST', '/auth/login', {'username': USERNAME, 'password': PASSWORD})
+    client.request(None, 'GET', f'/events/{event_id}')
+    while time.monotonic() < deadline:
+        with boards.lock:
+            table_no = boards.pending.pop() if boards.pending else None
+            claimed = table_no is not None
+            if claimed:
+                boards.in_flight += 1
+            elif boards.boards:
+                table_no = random.choice(boards.boards)  # a correction
+            generate = (not boards.pending and boards.in_flight == 0 and not boards.generating
+                        and boards.round_number < max_rounds)
+            if generate:
+                boards.generating = True
+
+        if generate:
+            client.request('arbiter /generate-pairings', 'POST', '/generate-pairings')
+            boards.refresh()
+            with boards.lock:
+                boards.generating = False
+            continue
+        if table_no is None:
+            time.sleep(0.01)
+            continue
+
+        form = {'section': boards.section_id, 'table_no': table_no, 'result': random.choice(RESULTS)}
+        status, _, _ = client.request('arbiter /record-result', 'POST', '/record-result', form)
+        if claimed:
+            with boards.lock:
+                boards.in_flight -= 1
+                if status >= 400 and table_no in boards.boards:
+                    boards.pending.append(table_no)  # try the board again
+        if think_time:
+            time.sleep(random.uniform(0, 2 * think_time))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=2, help='events running side by side')
+    parser.add_argument('--players', type=int, default=200, help='players per event')
+    parser.add_argument('--played-rounds', type=int, default=3, help='rounds already played when the test starts')
+    parser.add_argument('--rounds', type=int, default=9, help='rounds arbiters pair before only correcting results')
+    parser.add_argument('--spectators', type=int, default=20)
+    parser.add_argument('--arbiters', type=int, default=2, help='arbiters per event')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of traffic')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='mean pause between a user\'s requests, in seconds (0 for none)')
+    parser.add_argument('--server-processes', type=int, default=1,
+                        help='forked server processes; 1 serves from threads in one process')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--keep-db', action='store_true', help='leave the temporary database in place')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix='chess-load-')
+    server = None
+    try:
+        print(f'Seeding {args.events} events of {args.players} players in {workdir}', file=sys.stderr)
+        sections = seed(workdir, args.events, args.players, args.played_rounds, rng)
+
+        port_queue = multiprocessing.Queue()
+        server = multiprocessing.Process(
+            target=serve, args=(workdir, port_queue, args.server_processes == 1, args.server_processes),
+            daemon=True)
+        server.start()
+        port = port_queue.get(timeout=30)
+
+        stats = Stats()
+        database = os.path.join(workdir, 'tournament.sqlite')
+        deadline = time.monotonic() + args.duration
+        threads = []
+        for event_id, section_id in sections.items():
+            boards = EventBoards(database, section_id)
+            for _ in range(args.arbiters):
+                threads.append(threading.Thread(target=arbiter, args=(
+                    Client(port, stats), event_id, boards, deadline, args.rounds, args.think_time)))
+        for _ in range(args.spectators):
+            threads.append(threading.Thread(target=spectator, args=(
+                Client(port, stats), list(sections.values()), deadline, args.think_time)))
+
+        print(f'Driving {len(threads)} users for {args.duration:.0f}s', file=sys.stderr)
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+        if not args.keep_db:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = stats.report(elapsed)
+    for kind, row in report.items():
+        print(f"{kind:<28} {row['requests']:>7} req {row['throughput_rps']:>8.1f}/s  "
+              f"p50 {row['p50_ms']:>8.1f} ms  p95 {row['p95_ms']:>8.1f} ms  p99 {row['p99_ms']:>8.1f} ms  "
+              f"errors {row['error_rate']:.2%}  locked {row['locked_rate']:.2%}", file=sys.stderr)
+
+    output = {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'config': vars(args),
+        'duration_s': round(elapsed, 3),
+        'results': report,
+    }
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,13 +6,39 @@ def create_app(test_config=None):
     app.config.from_mapping(
         SECRET_KEY='dev',
         DATABASE=os.path.join(app.instance_path, 'tournament.sqlite'),
+        # 'matching' (weighted blossom matching) or 'greedy' (fast fallback)
+        PAIRING_ENGINE='matching',
+        # Fields this large are paired in a background process pool
+        PAIRING_JOB_THRESHOLD=1000,
+        PAIRING_WORKERS=None,
+        # Standings projections: simulated runs per request and the engine
+        # pairing the simulated rounds (they share the pairing pool)
+        PROJECTION_ITERATIONS=2000,
+        PROJECTION_ENGINE='greedy',
+        # Default tiebreak order for new tournaments (names from tiebreaks.TIEBREAKS)
+        TIEBREAK_ORDER=('buchholz',),
+        # Opt-in instrumentation: /metrics plus a slow-request log
+        METRICS_ENABLED=False,
+        SLOW_REQUEST_MS=500,
+        # Logged-in users cached per process: max entries and seconds to live
+        USER_CACHE_SIZE=1024,
+        USER_CACHE_TTL=300,
+        # Replay the results journal once when the app starts (see db.recover_db);
+        # turn off to run it only with 'flask recover-db'
+        RECOVER_ON_STARTUP=True,
     )
 
+    if test_config is not None:
+        app.config.from_mapping(test_config)
+
     try:
         os.makedirs(app.instance_path)
     except OSError:
         pass
 
+    from . import metrics
+    metrics.init_app(app)
+
     from . import db
     db.init_app(app)
 
@@ -24,4 +50,7 @@ def create_app(test_config=None):
     app.register_blueprint(routes.bp)
     app.add_url_rule('/', endpoint='index')
 
+    from . import api
+    app.register_blueprint(api.bp)
+
     return app
\ No newline at end of file
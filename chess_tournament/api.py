@@ -0,0 +1,120 @@
+"""
+Read-only JSON API for display boards and other clients.
+
+Every list is keyset-paginated: a page holds at most `limit` items and
+`next` is the cursor to pass back as `after` for the following page (null on
+the last one), so a client fetches just the slice it shows however large
+the field. `fields` selects a comma-separated subset of each item's keys.
+Responses are compact JSON and go through the page cache like the HTML
+pages, so unchanged pages are answered with 304 or from memory.
+
+    GET /api/sections/<id>/standings?after=<rank>
+    GET /api/sections/<id>/pairings?after=<table_no>
+    GET /api/sections/<id>/players/<sr_no>/games?after=<table_no>
+    GET /api/tournaments/<id>/standings?after=<rank>
+"""
+import json
+from flask import Blueprint, Response, request
+from . import db, page_cache, standings_cache
+from .routes import _tiebreak_order
+
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+PAIRING_FIELDS = ('Table_No', 'round_number', 'player1_SrNo', 'player1_name', 'player1_rating',
+                  'player2_SrNo', 'player2_name', 'player2_rating', 'result')
+GAME_FIELDS = ('Table_No', 'round_number', 'color', 'opponent_SrNo', 'opponent_name', 'opponent_rating', 'result')
+ARCHIVED_STANDING_FIELDS = ('rank', 'name', 'rating', 'points', 'buchholz')
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+@bp.errorhandler(ApiError)
+def api_error(error):
+    return _json({'error': str(error)}, error.status)
+
+
+def _json(payload, status=200):
+    return Response(json.dumps(payload, separators=(',', ':')), status, mimetype='application/json')
+
+
+def _page_args():
+    after = request.args.get('after', 0, type=int)
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    if after < 0:
+        raise ApiError('after must not be negative.')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(f'limit must be between 1 and {MAX_PAGE_SIZE}.')
+    return after, limit
+
+
+def _fields(available):
+    fields = request.args.get('fields')
+    if not fields:
+        return available
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+    unknown = [field for field in selected if field not in available]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}.")
+    return selected
+
+
+def _page(rows, fields, limit, cursor):
+    items = [{field: row[field] for field in fields} for row in rows]
+    next_after = rows[-1][cursor] if len(rows) == limit else None
+    return _json({'items': items, 'next': next_after})
+
+
+def _section(section_id):
+    section = db.get_section(section_id)
+    if section is None:
+        raise ApiError('Section not found.', 404)
+    return section
+
+
+@bp.route('/sections/<int:section_id>/standings')
+@page_cache.cached_page('board')
+def standings(section_id):
+    order = _tiebreak_order(_section(section_id))
+    fields = _fields(('rank', 'SrNo', 'name', 'rating', 'points', *dict.fromkeys(('buchholz', *order))))
+    after, limit = _page_args()
+    # The cached standings are already ranked, so a page is a slice
+    rows = [dict(player, rank=rank)
+            for rank, player in enumerate(standings_cache.get_standings(section_id, order)[after:after + limit],
+                                          after + 1)]
+    return _page(rows, fields, limit, 'rank')
+
+
+@bp.route('/sections/<int:section_id>/pairings')
+@page_cache.cached_page('board')
+def pairings(section_id):
+    _section(section_id)
+    fields = _fields(PAIRING_FIELDS)
+    after, limit = _page_args()
+    return _page(db.get_pairings_page(section_id, after, limit), fields, limit, 'Table_No')
+
+
+@bp.route('/sections/<int:section_id>/players/<int:sr_no>/games')
+@page_cache.cached_page('board')
+def player_games(section_id, sr_no):
+    if db.get_player_in_section(section_id, sr_no) is None:
+        raise ApiError('Player not found.', 404)
+    fields = _fields(GAME_FIELDS)
+    after, limit = _page_args()
+    return _page(db.get_player_games_page(sr_no, after, limit), fields, limit, 'Table_No')
+
+
+@bp.route('/tournaments/<int:tournament_id>/standings')
+@page_cache.cached_page()
+def archived_standings(tournament_id):
+    if db.get_tournament_details(tournament_id) is None:
+        raise ApiError('Tournament not found.', 404)
+    fields = _fields(ARCHIVED_STANDING_FIELDS)
+    after, limit = _page_args()
+    return _page(db.get_archived_standings_page(tournament_id, after, limit), fields, limit, 'rank')
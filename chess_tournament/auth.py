@@ -1,12 +1,68 @@
 import functools
+import threading
+import time
+from collections import OrderedDict
 from flask import (
-    Blueprint, flash, g, redirect, render_template, request, session, url_for
+    Blueprint, current_app, flash, g, redirect, render_template, request, session, url_for
 )
 from werkzeug.security import check_password_hash, generate_password_hash
 from chess_tournament.db import get_db
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+
+class UserCache:
+    """
+    Logged-in users by id, so a request with a session does not query the
+    user table. Entries expire after ttl seconds and the least recently used
+    are evicted beyond max_size. Only id and username are kept, never the
+    password hash. The cache lives on the app, one per worker process.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.lock = threading.Lock()
+        self.max_size = max_size
+        self.ttl = ttl
+        # user_id -> (expires_at, user dict or None)
+        self.entries = OrderedDict()
+
+    def get(self, user_id):
+        """Returns (hit, user); user is None for an id with no account."""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return False, None
+            if entry[0] < time.monotonic():
+                del self.entries[user_id]
+                return False, None
+            self.entries.move_to_end(user_id)
+            return True, entry[1]
+
+    def put(self, user_id, user):
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + self.ttl, user)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+
+def _get_user_cache():
+    return current_app.extensions.setdefault(
+        'user_cache', UserCache(current_app.config['USER_CACHE_SIZE'], current_app.config['USER_CACHE_TTL']))
+
+def _load_user(user_id):
+    cache = _get_user_cache()
+    hit, user = cache.get(user_id)
+    if not hit:
+        row = get_db().execute('SELECT id, username FROM user WHERE id = ?', (user_id,)).fetchone()
+        user = dict(row) if row is not None else None
+        cache.put(user_id, user)
+    return user
+
 @bp.route('/register', methods=('GET', 'POST'))
 def register():
     if request.method == 'POST':
@@ -22,11 +78,13 @@ def register():
 
         if error is None:
             try:
-                db.execute(
+                cursor = db.execute(
                     "INSERT INTO user (username, password) VALUES (?, ?)",
                     (username, generate_password_hash(password)),
                 )
                 db.commit()
+                # Drops a cached "no such user" for the id, e.g. after the database was re-initialised
+                _get_user_cache().invalidate(cursor.lastrowid)
             except db.IntegrityError:
                 error = f"User {username} is already registered."
             else:
@@ -63,17 +121,19 @@ def login():
 
 @bp.before_app_request
 def load_logged_in_user():
+    # Anonymous requests never touch the database here
     user_id = session.get('user_id')
 
     if user_id is None:
         g.user = None
     else:
-        g.user = get_db().execute(
-            'SELECT * FROM user WHERE id = ?', (user_id,)
-        ).fetchone()
+        g.user = _load_user(user_id)
 
 @bp.route('/logout')
 def logout():
+    user_id = session.get('user_id')
+    if user_id is not None:
+        _get_user_cache().invalidate(user_id)
     session.clear()
     return redirect(url_for('main.index'))
 
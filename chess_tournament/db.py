@@ -1,17 +1,298 @@
+import json
+import re
 import sqlite3
+import zlib
 import click
+from collections import defaultdict
 from flask import current_app, g
+from . import metrics
+from .tournament_state import RESULT_POINTS, TournamentState
+
+# Results an arbiter may enter for a board ('0-0' is only set by conclude_round).
+VALID_RESULTS = ('1-0', '0-1', '0.5-0.5')
+# Every result a finished board can hold; imports may write all of them.
+FINISHED_RESULTS = (*VALID_RESULTS, '0-0')
+
+# A bye board's result, from the bye player's side, and the points it is
+# worth. Boards written before byes had results are 'pending' (a full point).
+BYE_POINTS = {'1-0': 1.0, '0.5-0.5': 0.5, '0-0': 0.0, 'pending': 1.0}
+
+# Per-connection tuning. WAL lets the public boards keep reading while an
+# arbiter writes; NORMAL sync is safe in WAL mode and avoids an fsync per commit.
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -16000',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA busy_timeout = 5000',
+)
+
+# Schema migrations for databases created before a change to schema.sql.
+# PRAGMA user_version records how many have been applied; schema.sql always
+# describes the latest schema, so init_db marks all of them as applied.
+MIGRATIONS = [
+    # 1: indexes for the hot queries below
+    """
+    CREATE INDEX IF NOT EXISTS idx_players_standings ON players(points DESC, rating DESC, name);
+    CREATE INDEX IF NOT EXISTS idx_pairings_round ON pairings(round_number, result, player2_SrNo);
+    CREATE INDEX IF NOT EXISTS idx_pairings_result ON pairings(result, player1_SrNo, player2_SrNo);
+    CREATE INDEX IF NOT EXISTS idx_pairings_player1 ON pairings(player1_SrNo, player2_SrNo);
+    CREATE INDEX IF NOT EXISTS idx_pairings_player2 ON pairings(player2_SrNo, player1_SrNo);
+    CREATE INDEX IF NOT EXISTS idx_tournaments_date ON tournaments(date_concluded);
+    CREATE INDEX IF NOT EXISTS idx_history_standings_rank ON history_standings(tournament_id, rank);
+    """,
+    # 2: player names are unique regardless of case
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_players_name_nocase ON players(name COLLATE NOCASE);
+    """,
+    # 3: finished-games index also covers round_number (Progressive tiebreak)
+    """
+    DROP INDEX IF EXISTS idx_pairings_result;
+    CREATE INDEX idx_pairings_result ON pairings(result, player1_SrNo, player2_SrNo, round_number);
+    """,
+    # 4: events and sections; players and pairings are rebuilt with a
+    # section_id, and a running tournament becomes event 1, section 'Open'
+    """
+    CREATE TABLE events(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        tiebreaks TEXT NOT NULL DEFAULT 'buchholz',
+        created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE sections(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        UNIQUE (event_id, name),
+        FOREIGN KEY (event_id) REFERENCES events(id)
+    );
+    INSERT INTO events (id, name) SELECT 1, 'Tournament' WHERE EXISTS (SELECT 1 FROM players);
+    INSERT INTO sections (id, event_id, name) SELECT 1, 1, 'Open' WHERE EXISTS (SELECT 1 FROM players);
+
+    CREATE TABLE players_new(
+        SrNo INTEGER PRIMARY KEY AUTOINCREMENT,
+        section_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        rating INTEGER NOT NULL,
+        points REAL DEFAULT 0.0,
+        FOREIGN KEY (section_id) REFERENCES sections(id)
+    );
+    INSERT INTO players_new (SrNo, section_id, name, rating, points) SELECT SrNo, 1, name, rating, points FROM players;
+    DROP TABLE players;
+    ALTER TABLE players_new RENAME TO players;
+
+    CREATE TABLE pairings_new(
+        Table_No INTEGER PRIMARY KEY AUTOINCREMENT,
+        section_id INTEGER NOT NULL,
+        round_number INTEGER NOT NULL,
+        player1_SrNo INTEGER NOT NULL,
+        player2_SrNo INTEGER,
+        result TEXT DEFAULT 'pending',
+        FOREIGN KEY (section_id) REFERENCES sections(id),
+        FOREIGN KEY (player1_SrNo) REFERENCES players(SrNo),
+        FOREIGN KEY (player2_SrNo) REFERENCES players(SrNo)
+    );
+    INSERT INTO pairings_new (Table_No, section_id, round_number, player1_SrNo, player2_SrNo, result)
+        SELECT Table_No, 1, round_number, player1_SrNo, player2_SrNo, result FROM pairings;
+    DROP TABLE pairings;
+    ALTER TABLE pairings_new RENAME TO pairings;
+
+    CREATE UNIQUE INDEX idx_players_name_nocase ON players(section_id, name COLLATE NOCASE);
+    CREATE INDEX idx_players_standings ON players(section_id, points DESC, rating DESC, name);
+    CREATE INDEX idx_pairings_round ON pairings(section_id, round_number, result, player2_SrNo);
+    CREATE INDEX idx_pairings_result ON pairings(section_id, result, player1_SrNo, player2_SrNo, round_number);
+    CREATE INDEX idx_pairings_player1 ON pairings(player1_SrNo, player2_SrNo);
+    CREATE INDEX idx_pairings_player2 ON pairings(player2_SrNo, player1_SrNo);
+    """,
+    # 5: results journal and snapshots; existing sections start from a
+    # snapshot of their current points
+    """
+    CREATE TABLE journal(
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        section_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        round_number INTEGER,
+        table_no INTEGER,
+        player1_SrNo INTEGER,
+        player2_SrNo INTEGER,
+        old_result TEXT,
+        new_result TEXT,
+        ref INTEGER,
+        undone INTEGER NOT NULL DEFAULT 0,
+        created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (section_id) REFERENCES sections(id)
+    );
+    CREATE TABLE snapshots(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        section_id INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        points TEXT NOT NULL,
+        created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (section_id) REFERENCES sections(id)
+    );
+    CREATE INDEX idx_journal_section ON journal(section_id, seq);
+    CREATE INDEX idx_snapshots_section ON snapshots(section_id, seq);
+    INSERT INTO snapshots (section_id, seq, points)
+        SELECT section_id, 0, json_group_array(json_array(SrNo, points)) FROM players GROUP BY section_id;
+    """,
+    # 6: keyset-paginated history, player lookups and full-text search
+    """
+    DROP INDEX IF EXISTS idx_tournaments_date;
+    CREATE INDEX idx_tournaments_date ON tournaments(date_concluded, id);
+    CREATE INDEX idx_history_standings_name ON history_standings(name COLLATE NOCASE, tournament_id);
+    CREATE VIRTUAL TABLE tournaments_fts USING fts5(name, content='tournaments', content_rowid='id');
+    CREATE VIRTUAL TABLE history_standings_fts USING fts5(name, content='history_standings', content_rowid='id');
+    CREATE TRIGGER tournaments_fts_insert AFTER INSERT ON tournaments BEGIN
+        INSERT INTO tournaments_fts(rowid, name) VALUES (new.id, new.name);
+    END;
+    CREATE TRIGGER tournaments_fts_delete AFTER DELETE ON tournaments BEGIN
+        INSERT INTO tournaments_fts(tournaments_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END;
+    CREATE TRIGGER tournaments_fts_update AFTER UPDATE OF name ON tournaments BEGIN
+        INSERT INTO tournaments_fts(tournaments_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO tournaments_fts(rowid, name) VALUES (new.id, new.name);
+    END;
+    CREATE TRIGGER history_standings_fts_insert AFTER INSERT ON history_standings BEGIN
+        INSERT INTO history_standings_fts(rowid, name) VALUES (new.id, new.name);
+    END;
+    CREATE TRIGGER history_standings_fts_delete AFTER DELETE ON history_standings BEGIN
+        INSERT INTO history_standings_fts(history_standings_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END;
+    CREATE TRIGGER history_standings_fts_update AFTER UPDATE OF name ON history_standings BEGIN
+        INSERT INTO history_standings_fts(history_standings_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO history_standings_fts(rowid, name) VALUES (new.id, new.name);
+    END;
+    INSERT INTO tournaments_fts(tournaments_fts) VALUES ('rebuild');
+    INSERT INTO history_standings_fts(history_standings_fts) VALUES ('rebuild');
+    """,
+    # 7: compressed game records of archived tournaments
+    """
+    CREATE TABLE tournament_games(
+        tournament_id INTEGER PRIMARY KEY,
+        games INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
+    );
+    """,
+    # 8: round-robin and Scheveningen sections with precomputed schedules
+    """
+    ALTER TABLE sections ADD COLUMN format TEXT NOT NULL DEFAULT 'swiss';
+    CREATE TABLE schedule(
+        section_id INTEGER NOT NULL,
+        round_number INTEGER NOT NULL,
+        board INTEGER NOT NULL,
+        player1_SrNo INTEGER NOT NULL,
+        player2_SrNo INTEGER,
+        PRIMARY KEY (section_id, round_number, board),
+        FOREIGN KEY (section_id) REFERENCES sections(id)
+    ) WITHOUT ROWID;
+    """,
+    # 9: a per-section version, so every process can tell its cached standings are stale
+    """
+    ALTER TABLE sections ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+    """,
+    # 10: the round index covers the board query in Table_No order; the
+    # result index was covering too and lured the planner into section scans
+    """
+    DROP INDEX IF EXISTS idx_pairings_round;
+    DROP INDEX IF EXISTS idx_pairings_result;
+    CREATE INDEX idx_pairings_round ON pairings(section_id, round_number, Table_No, player1_SrNo, player2_SrNo, result);
+    """,
+    # 11: pairings-board events, so every worker process can push them to its browsers
+    """
+    CREATE TABLE board_events(
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        event TEXT NOT NULL,
+        data TEXT NOT NULL
+    );
+    """,
+]
+
+# A section's points are snapshotted after this many journal entries, and
+# only the newest SNAPSHOTS_KEPT snapshots are kept.
+SNAPSHOT_INTERVAL = 500
+SNAPSHOTS_KEPT = 3
+
+# Only the newest BOARD_EVENTS_KEPT board events are kept.
+BOARD_EVENTS_KEPT = 1000
+
+# Database files already switched to WAL and migrated by this process.
+_prepared_databases = set()
 
 # --- CORE CONNECTION FUNCTIONS ---
 def get_db():
     if 'db' not in g:
         g.db = sqlite3.connect(
             current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            cached_statements=256,
+            factory=metrics.InstrumentedConnection if current_app.config['METRICS_ENABLED'] else sqlite3.Connection
         )
         g.db.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            g.db.execute(pragma)
+        if current_app.config['DATABASE'] not in _prepared_databases:
+            _prepare_database(g.db)
+            _prepared_databases.add(current_app.config['DATABASE'])
     return g.db
 
+def _prepare_database(db):
+    # journal_mode is stored in the database file, so this runs once per file.
+    db.execute('PRAGMA journal_mode = WAL')
+    migrate_db(db)
+
+def recover_on_startup(app):
+    """
+    Migrates the database and replays the journal tail after the latest
+    snapshots (cheap when nothing is off), once when the app is created
+    rather than on the first connection of every worker.
+    """
+    with app.app_context():
+        if not _is_initialised(get_db()):
+            return
+        corrected = recover_db()
+        if corrected:
+            app.logger.warning('Recovered points from the journal: %s', corrected)
+
+def _is_initialised(db):
+    return db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pairings'").fetchone() is not None
+
+def migrate_db(db=None):
+    """
+    Applies pending MIGRATIONS to an existing database. Returns how many ran.
+    Each script runs in one transaction with its user_version bump, so a
+    failed migration leaves nothing behind and can be retried.
+    """
+    db = db or get_db()
+    if not _is_initialised(db):
+        return 0  # Not initialised yet; init_db creates the latest schema.
+    if db.execute('PRAGMA user_version').fetchone()[0] >= len(MIGRATIONS):
+        return 0
+    applied = 0
+    while True:
+        with db:
+            # IMMEDIATE: a process migrating at the same time waits here and
+            # then sees the new user_version instead of re-running the script.
+            db.execute('BEGIN IMMEDIATE')
+            version = db.execute('PRAGMA user_version').fetchone()[0]
+            if version >= len(MIGRATIONS):
+                return applied
+            for statement in _statements(MIGRATIONS[version]):
+                db.execute(statement)
+            db.execute(f'PRAGMA user_version = {version + 1}')
+        applied += 1
+
+def _statements(script):
+    # executescript would commit first, so scripts are run statement by
+    # statement; complete_statement keeps trigger bodies in one piece.
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ''
+    if statement.strip():
+        yield statement.strip()
+
 def close_db(e=None):
     db = g.pop('db', None)
     if db is not None:
@@ -21,42 +302,209 @@ def init_db():
     db = get_db()
     with current_app.open_resource('schema.sql') as f:
         db.executescript(f.read().decode('utf8'))
+    db.execute(f'PRAGMA user_version = {len(MIGRATIONS)}')
 
 @click.command('init-db')
 def init_db_command():
     init_db()
     click.echo('Initialized the database.')
 
+@click.command('migrate-db')
+def migrate_db_command():
+    applied = migrate_db()
+    click.echo(f'Applied {applied} migration(s).')
+
+@click.command('recover-db')
+def recover_db_command():
+    migrate_db()
+    corrected = recover_db()
+    click.echo(f'Corrected points in {len(corrected)} section(s).')
+
 def init_app(app):
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_db_command)
+    app.cli.add_command(recover_db_command)
+    if app.config['RECOVER_ON_STARTUP']:
+        recover_on_startup(app)
+
+def iter_query(query, params=(), chunk_size=500):
+    """Yields rows of a query, fetched from the cursor chunk_size at a time."""
+    cursor = get_db().execute(query, params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield from rows
+
+# --- EVENT & SECTION FUNCTIONS ---
+def create_event_in_db(name, section_names, tiebreak_order, section_format='swiss'):
+    """Creates an event with its sections. Returns (event_id, [section ids in order])."""
+    db = get_db()
+    with db:
+        cursor = db.execute('INSERT INTO events (name, tiebreaks) VALUES (?, ?)', (name, ','.join(tiebreak_order)))
+        event_id = cursor.lastrowid
+        section_ids = [
+            db.execute('INSERT INTO sections (event_id, name, format) VALUES (?, ?, ?)',
+                       (event_id, section, section_format)).lastrowid
+            for section in section_names
+        ]
+    return event_id, section_ids
+
+def get_event(event_id):
+    db = get_db()
+    return db.execute('SELECT * FROM events WHERE id = ?', (event_id,)).fetchone()
+
+def get_all_events():
+    """Every running event, newest first."""
+    db = get_db()
+    return db.execute('SELECT * FROM events ORDER BY id DESC').fetchall()
+
+def get_sections(event_id):
+    db = get_db()
+    return db.execute('SELECT * FROM sections WHERE event_id = ? ORDER BY id', (event_id,)).fetchall()
+
+def get_section(section_id):
+    """A section row with its event's name and tiebreaks."""
+    db = get_db()
+    return db.execute('''
+        SELECT s.id, s.event_id, s.name, s.format, e.name as event_name, e.tiebreaks
+        FROM sections s JOIN events e ON e.id = s.event_id
+        WHERE s.id = ?
+    ''', (section_id,)).fetchone()
+
+def get_section_version(section_id):
+    """A section's version, bumped by every committed change to its players or pairings (None if it is gone)."""
+    db = get_db()
+    row = db.execute('SELECT version FROM sections WHERE id = ?', (section_id,)).fetchone()
+    return row[0] if row is not None else None
+
+def _bump_version(db, section_id):
+    # Called once inside each write transaction; the new value is returned to
+    # the caller so in-process caches can tell which change they are applying.
+    row = db.execute('UPDATE sections SET version = version + 1 WHERE id = ? RETURNING version',
+                     (section_id,)).fetchone()
+    return row[0] if row is not None else None
+
+def delete_event_in_db(event_id):
+    """Removes an event with its sections, players and pairings."""
+    db = get_db()
+    with db:
+        for table in ('journal', 'snapshots', 'schedule', 'pairings', 'players'):
+            db.execute(f'DELETE FROM {table} WHERE section_id IN (SELECT id FROM sections WHERE event_id = ?)',
+                       (event_id,))
+        db.execute('DELETE FROM sections WHERE event_id = ?', (event_id,))
+        db.execute('DELETE FROM events WHERE id = ?', (event_id,))
 
 # --- PLAYER FUNCTIONS ---
-def get_all_players_from_db():
+def get_all_players_from_db(section_id):
     db = get_db()
-    players = db.execute('SELECT SrNo, name, rating, points FROM players ORDER BY points DESC, rating DESC').fetchall()
+    players = db.execute(
+        'SELECT SrNo, name, rating, points FROM players WHERE section_id = ? ORDER BY points DESC, rating DESC',
+        (section_id,)
+    ).fetchall()
     return players
 
-def add_player_to_db(name, rating):
+def add_player_to_db(section_id, name, rating):
     db = get_db()
-    db.execute('INSERT INTO players (name, rating) VALUES (?, ?)', (name, rating))
-    db.commit()
+    with db:
+        db.execute('INSERT INTO players (section_id, name, rating) VALUES (?, ?, ?)', (section_id, name, rating))
+        _bump_version(db, section_id)
 
-def update_player_score_in_db(player_sr_no, points_to_add):
+def add_players_to_db(section_id, rows):
+    """
+    Registers many players in one section in one transaction.
+    rows is an iterable of (line_no, name, rating) and may be a generator over
+    an upload stream. Duplicates (against existing players or earlier rows)
+    are detected by the UNIQUE name index. Returns (added, errors) where
+    errors is a list of (line_no, message).
+    """
     db = get_db()
-    db.execute('UPDATE players SET points = points + ? WHERE SrNo = ?', (points_to_add, player_sr_no))
-    db.commit()
+    added = 0
+    errors = []
+    with db:
+        for line_no, name, rating in rows:
+            cursor = db.execute('INSERT OR IGNORE INTO players (section_id, name, rating) VALUES (?, ?, ?)',
+                                (section_id, name, rating))
+            if cursor.rowcount:
+                added += 1
+            else:
+                errors.append((line_no, f"Player '{name}' is already registered."))
+        if added:
+            _bump_version(db, section_id)
+    return added, errors
 
 # --- PAIRING FUNCTIONS ---
-def add_pairings_to_db(pairings, round_number):
+def add_round_to_db(section_id, pairings, round_number, bye_results=None):
+    """
+    Inserts a section's round and awards its byes in one transaction.
+    bye_results maps a bye's SrNo to its result (a key of BYE_POINTS);
+    byes not in it are worth a full point. Returns (the byes as (SrNo,
+    points), the section's new version). Raises ValueError if the previous
+    round is not the section's latest one (e.g. another request already
+    wrote this round).
+    """
     db = get_db()
-    db.executemany(
-        'INSERT INTO pairings (round_number, player1_SrNo, player2_SrNo) VALUES (?, ?, ?)',
-        [(round_number, p1, p2) for p1, p2 in pairings]
-    )
-    db.commit()
+    bye_results = bye_results or {}
+    results = [None if p2 is not None else bye_results.get(p1, '1-0') for p1, p2 in pairings]
+    for result in results:
+        if result is not None and result not in BYE_POINTS:
+            raise ValueError(f"Invalid bye result '{result}'.")
+    byes = [(p1, BYE_POINTS[result]) for (p1, _), result in zip(pairings, results) if result is not None]
+    with db:
+        # IMMEDIATE takes the write lock before the check, so two writers
+        # cannot both see round_number - 1 as the latest round.
+        db.execute('BEGIN IMMEDIATE')
+        latest = db.execute('SELECT COALESCE(MAX(round_number), 0) FROM pairings WHERE section_id = ?',
+                            (section_id,)).fetchone()[0]
+        if latest != round_number - 1:
+            raise ValueError(f'Round {round_number} cannot be added after round {latest}.')
+        db.executemany(
+            'INSERT INTO pairings (section_id, round_number, player1_SrNo, player2_SrNo, result) '
+            "VALUES (?, ?, ?, ?, COALESCE(?, 'pending'))",
+            [(section_id, round_number, p1, p2, result) for (p1, p2), result in zip(pairings, results)]
+        )
+        _journal(db, section_id, 'round', round_number=round_number)
+        for (p1, _), result in zip(pairings, results):
+            if result is None:
+                continue
+            db.execute('UPDATE players SET points = points + ? WHERE SrNo = ?', (BYE_POINTS[result], p1))
+            _journal(db, section_id, 'bye', round_number=round_number, player1_SrNo=p1, new_result=result)
+        _snapshot_if_due(db, section_id)
+        version = _bump_version(db, section_id)
+    return byes, version
+
+# --- SCHEDULED SECTIONS (round-robin, Scheveningen) ---
+def save_schedule_in_db(section_id, schedule):
+    """
+    Writes a section's whole schedule, (round_number, board, p1, p2) rows,
+    in one bulk insert. Raises ValueError if the section already has one.
+    """
+    db = get_db()
+    with db:
+        db.execute('BEGIN IMMEDIATE')
+        if db.execute('SELECT 1 FROM schedule WHERE section_id = ? LIMIT 1', (section_id,)).fetchone():
+            raise ValueError('This section already has a schedule.')
+        db.executemany(
+            'INSERT INTO schedule (section_id, round_number, board, player1_SrNo, player2_SrNo) VALUES (?, ?, ?, ?, ?)',
+            [(section_id, *game) for game in schedule]
+        )
+
+def get_scheduled_round(section_id, round_number):
+    """A scheduled round's pairings as (p1, p2) SrNo tuples in board order; empty past the last round."""
+    db = get_db()
+    return [tuple(row) for row in db.execute(
+        'SELECT player1_SrNo, player2_SrNo FROM schedule WHERE section_id = ? AND round_number = ? ORDER BY board',
+        (section_id, round_number)
+    )]
+
+def get_scheduled_rounds(section_id):
+    """How many rounds a section's schedule has (0 when it has none)."""
+    db = get_db()
+    return db.execute('SELECT COALESCE(MAX(round_number), 0) FROM schedule WHERE section_id = ?',
+                      (section_id,)).fetchone()[0]
 
-def get_current_pairings_from_db():
+def get_current_pairings_from_db(section_id):
     db = get_db()
     pairings = db.execute('''
         SELECT p.Table_No, p.round_number, p.player1_SrNo, p.player2_SrNo,
@@ -64,92 +512,523 @@ def get_current_pairings_from_db():
         FROM pairings p
         JOIN players p1 ON p.player1_SrNo = p1.SrNo
         LEFT JOIN players p2 ON p.player2_SrNo = p2.SrNo
-        WHERE p.round_number = (SELECT MAX(round_number) FROM pairings)
-    ''').fetchall()
+        WHERE p.section_id = ?1 AND p.round_number = (SELECT MAX(round_number) FROM pairings WHERE section_id = ?1)
+        ORDER BY p.Table_No
+    ''', (section_id,)).fetchall()
     return pairings
 
-def get_match_history_from_db():
+def get_byes_from_db(section_id):
+    """Every bye of a section as (SrNo, round_number, points), half- and zero-point ones included."""
     db = get_db()
-    history_tuples = db.execute('SELECT player1_SrNo, player2_SrNo FROM pairings WHERE player2_SrNo IS NOT NULL').fetchall()
-    history = {tuple(sorted((p1, p2))) for p1, p2 in history_tuples}
-    return history
+    return [(row[0], row[1], BYE_POINTS[row[2]]) for row in db.execute(
+        'SELECT player1_SrNo, round_number, result FROM pairings WHERE section_id = ? AND player2_SrNo IS NULL',
+        (section_id,)
+    )]
 
-def get_latest_round_number():
+def get_tournament_state(section_id):
+    """Loads a section's players, every pairing and the byes into a compact TournamentState."""
     db = get_db()
-    result = db.execute('SELECT MAX(round_number) FROM pairings').fetchone()
-    return result[0] if result[0] is not None else 0
+    games = db.execute(
+        'SELECT player1_SrNo, player2_SrNo, result, round_number FROM pairings '
+        'WHERE section_id = ? AND player2_SrNo IS NOT NULL',
+        (section_id,)
+    )
+    return TournamentState(get_all_players_from_db(section_id), games, get_byes_from_db(section_id))
 
-def update_match_result_in_db(table_no, result):
+def get_latest_round_number(section_id):
     db = get_db()
-    db.execute('UPDATE pairings SET result = ? WHERE Table_No = ?', (result, table_no))
-    db.commit()
+    result = db.execute('SELECT MAX(round_number) FROM pairings WHERE section_id = ?', (section_id,)).fetchone()
+    return result[0] if result[0] is not None else 0
 
-def get_match_by_table_no(table_no):
+def record_results_in_db(section_id, results, allowed=VALID_RESULTS):
+    """
+    Applies many board results of one section in one transaction.
+    results is an iterable of (table_no, result). Each board's old result is
+    reverted and the new one applied, with all score deltas summed per player
+    so every player row is updated once. Raises ValueError (and writes
+    nothing) if any board is invalid or a result is not in allowed. Returns (changes, version):
+    the applied changes as (table_no, player1_SrNo, player2_SrNo,
+    old_result, new_result) and the section's new version (None when
+    nothing changed).
+    """
     db = get_db()
-    match = db.execute('SELECT * FROM pairings WHERE Table_No = ?', (table_no,)).fetchone()
-    return match
+    results = dict(results)
+    for table_no, result in results.items():
+        if result not in allowed:
+            raise ValueError(f"Invalid result '{result}' for table {table_no}.")
+
+    tables = list(results)
+    with db:
+        # IMMEDIATE takes the write lock before the old results are read, so
+        # two arbiters correcting the same board cannot both revert the same
+        # old result.
+        db.execute('BEGIN IMMEDIATE')
+        matches = {}
+        for start in range(0, len(tables), 500):
+            chunk = tables[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for m in db.execute(
+                f'SELECT Table_No, player1_SrNo, player2_SrNo, result FROM pairings '
+                f'WHERE Table_No IN ({placeholders}) AND section_id = ?',
+                (*chunk, section_id)
+            ):
+                matches[m['Table_No']] = m
+
+        changes = []
+        deltas = defaultdict(float)
+        for table_no, new_result in results.items():
+            match = matches.get(table_no)
+            if match is None:
+                raise ValueError(f"Table {table_no} does not exist.")
+            if match['player2_SrNo'] is None:
+                raise ValueError(f"Table {table_no} is a bye.")
+            old_result = match['result']
+            if old_result == new_result:
+                continue
+            old_p1, old_p2 = RESULT_POINTS.get(old_result, (0.0, 0.0))
+            new_p1, new_p2 = RESULT_POINTS[new_result]
+            deltas[match['player1_SrNo']] += new_p1 - old_p1
+            deltas[match['player2_SrNo']] += new_p2 - old_p2
+            changes.append((table_no, match['player1_SrNo'], match['player2_SrNo'], old_result, new_result))
+        if not changes:
+            return changes, None
+
+        db.executemany(
+            'UPDATE pairings SET result = ? WHERE Table_No = ?',
+            [(new_result, table_no) for table_no, _, _, _, new_result in changes]
+        )
+        db.executemany(
+            'UPDATE players SET points = points + ? WHERE SrNo = ?',
+            [(delta, sr_no) for sr_no, delta in deltas.items() if delta]
+        )
+        _journal_results(db, section_id, 'result', changes)
+        _snapshot_if_due(db, section_id)
+        version = _bump_version(db, section_id)
+    return changes, version
 
-def are_all_results_in():
+def are_all_results_in(section_id):
     db = get_db()
-    latest_round = get_latest_round_number()
+    latest_round = get_latest_round_number(section_id)
     if latest_round == 0: return True
     pending_matches = db.execute(
-        'SELECT COUNT(*) FROM pairings WHERE round_number = ? AND result = ? AND player2_SrNo IS NOT NULL',
-        (latest_round, 'pending')
+        'SELECT COUNT(*) FROM pairings WHERE section_id = ? AND round_number = ? AND result = ? AND player2_SrNo IS NOT NULL',
+        (section_id, latest_round, 'pending')
     ).fetchone()[0]
     return pending_matches == 0
 
-def get_all_finished_matches_from_db():
+def iter_current_pairings(section_id):
+    return iter_query('''
+        SELECT p.Table_No, p.round_number, p1.name as player1_name, p1.rating as player1_rating,
+               p2.name as player2_name, p2.rating as player2_rating, p.result
+        FROM pairings p
+        JOIN players p1 ON p.player1_SrNo = p1.SrNo
+        LEFT JOIN players p2 ON p.player2_SrNo = p2.SrNo
+        WHERE p.section_id = ?1 AND p.round_number = (SELECT MAX(round_number) FROM pairings WHERE section_id = ?1)
+        ORDER BY p.Table_No
+    ''', (section_id,))
+
+def get_pairings_page(section_id, after=0, limit=100):
+    """The current round's boards with Table_No above after, in board order (keyset pagination)."""
+    db = get_db()
+    return db.execute('''
+        SELECT p.Table_No, p.round_number, p.player1_SrNo, p1.name as player1_name, p1.rating as player1_rating,
+               p.player2_SrNo, p2.name as player2_name, p2.rating as player2_rating, p.result
+        FROM pairings p
+        JOIN players p1 ON p.player1_SrNo = p1.SrNo
+        LEFT JOIN players p2 ON p.player2_SrNo = p2.SrNo
+        WHERE p.section_id = ?1 AND p.round_number = (SELECT MAX(round_number) FROM pairings WHERE section_id = ?1)
+          AND p.Table_No > ?2
+        ORDER BY p.Table_No LIMIT ?3
+    ''', (section_id, after, limit)).fetchall()
+
+def get_player_in_section(section_id, sr_no):
+    db = get_db()
+    return db.execute('SELECT SrNo, name, rating, points FROM players WHERE SrNo = ? AND section_id = ?',
+                      (sr_no, section_id)).fetchone()
+
+def get_player_games_page(sr_no, after=0, limit=100):
+    """A player's boards (byes included) with Table_No above after, in order, seen from the player's side."""
+    db = get_db()
+    return db.execute('''
+        SELECT g.Table_No, g.round_number, g.color, g.opponent_SrNo, o.name as opponent_name,
+               o.rating as opponent_rating, g.result
+        FROM (
+            SELECT Table_No, round_number, 'white' as color, player2_SrNo as opponent_SrNo, result
+            FROM pairings WHERE player1_SrNo = ?1 AND Table_No > ?2
+            UNION ALL
+            SELECT Table_No, round_number, 'black', player1_SrNo, result
+            FROM pairings WHERE player2_SrNo = ?1 AND Table_No > ?2
+        ) g
+        LEFT JOIN players o ON o.SrNo = g.opponent_SrNo
+        ORDER BY g.Table_No LIMIT ?3
+    ''', (sr_no, after, limit)).fetchall()
+
+def iter_section_pairings(section_id):
+    """Every board of a section as (round_number, player1_SrNo, player2_SrNo, result), in round order."""
+    return iter_query(
+        'SELECT round_number, player1_SrNo, player2_SrNo, result FROM pairings '
+        'WHERE section_id = ? ORDER BY round_number, Table_No',
+        (section_id,)
+    )
+
+def iter_all_games(section_id):
+    """Every board of a section, byes included, in round order."""
+    return iter_query('''
+        SELECT p.round_number, p.Table_No, p1.name as player1_name, p2.name as player2_name, p.result
+        FROM pairings p
+        JOIN players p1 ON p.player1_SrNo = p1.SrNo
+        LEFT JOIN players p2 ON p.player2_SrNo = p2.SrNo
+        WHERE p.section_id = ?
+        ORDER BY p.Table_No
+    ''', (section_id,))
+
+def get_standings_data(section_id):
+    """
+    A section's (version, players, finished games), read in one transaction
+    so the version matches the rows.
+    """
     db = get_db()
-    matches = db.execute("SELECT player1_SrNo, player2_SrNo, result FROM pairings WHERE result IS NOT 'pending' AND player2_SrNo IS NOT NULL").fetchall()
+    with db:
+        db.execute('BEGIN')
+        version = get_section_version(section_id)
+        players = get_all_players_from_db(section_id)
+        matches = get_all_finished_matches_from_db(section_id)
+    return version, players, matches
+
+def get_all_finished_matches_from_db(section_id):
+    db = get_db()
+    matches = db.execute(
+        "SELECT player1_SrNo, player2_SrNo, result, round_number FROM pairings "
+        "WHERE section_id = ? AND result IS NOT 'pending' AND player2_SrNo IS NOT NULL",
+        (section_id,)
+    ).fetchall()
     return matches
 
 # --- ACTIVE TOURNAMENT FUNCTIONS ---
-def conclude_round_in_db():
+def conclude_round_in_db(section_id):
+    """
+    Closes pending boards of a section's latest round as 0-0. Returns
+    (the boards as (table_no, p1, p2), the section's new version).
+    """
+    db = get_db()
+    with db:
+        # The boards are read under the write lock, so a result recorded
+        # meanwhile is neither overwritten nor journaled as pending -> 0-0.
+        db.execute('BEGIN IMMEDIATE')
+        latest_round = get_latest_round_number(section_id)
+        if latest_round == 0:
+            return [], None
+        games = db.execute(
+            "SELECT Table_No, player1_SrNo, player2_SrNo FROM pairings "
+            "WHERE section_id = ? AND round_number = ? AND result = 'pending' AND player2_SrNo IS NOT NULL",
+            (section_id, latest_round)
+        ).fetchall()
+        games = [(g['Table_No'], g['player1_SrNo'], g['player2_SrNo']) for g in games]
+        db.execute(
+            "UPDATE pairings SET result = '0-0' "
+            "WHERE section_id = ? AND round_number = ? AND result = 'pending' AND player2_SrNo IS NOT NULL",
+            (section_id, latest_round)
+        )
+        _journal_results(db, section_id, 'result', [(*game, 'pending', '0-0') for game in games])
+        _snapshot_if_due(db, section_id)
+        version = _bump_version(db, section_id)
+    return games, version
+
+# --- JOURNAL FUNCTIONS ---
+# Every change to a section's scores is appended to the journal inside the
+# transaction that makes it, so players.points can always be rebuilt from
+# the latest snapshot plus the entries after it.
+
+def _journal(db, section_id, kind, **columns):
+    columns = {'section_id': section_id, 'kind': kind, **columns}
+    db.execute(
+        f"INSERT INTO journal ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        tuple(columns.values())
+    )
+
+def _journal_results(db, section_id, kind, changes, ref=None):
+    """Journals (table_no, p1, p2, old_result, new_result) board changes."""
+    db.executemany(
+        'INSERT INTO journal (section_id, kind, table_no, player1_SrNo, player2_SrNo, old_result, new_result, ref) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        [(section_id, kind, *change, ref) for change in changes]
+    )
+
+def _snapshot_if_due(db, section_id):
+    last = db.execute('SELECT COALESCE(MAX(seq), 0) FROM snapshots WHERE section_id = ?', (section_id,)).fetchone()[0]
+    pending, latest = db.execute(
+        'SELECT COUNT(*), MAX(seq) FROM journal WHERE section_id = ? AND seq > ?', (section_id, last)
+    ).fetchone()
+    if pending < SNAPSHOT_INTERVAL:
+        return
+    points = db.execute('SELECT SrNo, points FROM players WHERE section_id = ?', (section_id,)).fetchall()
+    db.execute('INSERT INTO snapshots (section_id, seq, points) VALUES (?, ?, ?)',
+               (section_id, latest, json.dumps([tuple(row) for row in points], separators=(',', ':'))))
+    db.execute('''
+        DELETE FROM snapshots WHERE section_id = ?1 AND id NOT IN (
+            SELECT id FROM snapshots WHERE section_id = ?1 ORDER BY seq DESC LIMIT ?2)
+    ''', (section_id, SNAPSHOTS_KEPT))
+
+def _apply_board_change(db, section_id, kind, entry, old_result, new_result):
+    # Moves one board from old_result to new_result and journals it against entry.
+    old_p1, old_p2 = RESULT_POINTS.get(old_result, (0.0, 0.0))
+    new_p1, new_p2 = RESULT_POINTS.get(new_result, (0.0, 0.0))
+    db.execute('UPDATE pairings SET result = ? WHERE Table_No = ?', (new_result, entry['table_no']))
+    db.executemany('UPDATE players SET points = points + ? WHERE SrNo = ?',
+                   [(new_p1 - old_p1, entry['player1_SrNo']), (new_p2 - old_p2, entry['player2_SrNo'])])
+    change = (entry['table_no'], entry['player1_SrNo'], entry['player2_SrNo'], old_result, new_result)
+    _journal_results(db, section_id, kind, [change], ref=entry['seq'])
+    _snapshot_if_due(db, section_id)
+    return change, _bump_version(db, section_id)
+
+def undo_result_in_db(section_id):
+    """
+    Reverts the section's latest result that is still in effect. Returns
+    (the change as (table_no, player1_SrNo, player2_SrNo, old_result,
+    new_result), the section's new version), or None if there is nothing to
+    undo.
+    """
+    db = get_db()
+    with db:
+        db.execute('BEGIN IMMEDIATE')
+        entry = db.execute(
+            "SELECT * FROM journal WHERE section_id = ? AND kind = 'result' AND undone = 0 ORDER BY seq DESC LIMIT 1",
+            (section_id,)
+        ).fetchone()
+        if entry is None:
+            return None
+        db.execute('UPDATE journal SET undone = 1 WHERE seq = ?', (entry['seq'],))
+        return _apply_board_change(db, section_id, 'undo', entry, entry['new_result'], entry['old_result'])
+
+def redo_result_in_db(section_id):
+    """
+    Re-applies the most recently undone result, unless a new result has been
+    recorded since. Returns the change like undo_result_in_db, or None.
+    """
+    db = get_db()
+    with db:
+        db.execute('BEGIN IMMEDIATE')
+        entry = db.execute('''
+            SELECT r.* FROM journal u JOIN journal r ON r.seq = u.ref
+            WHERE u.section_id = ?1 AND u.kind = 'undo' AND r.undone = 1
+              AND u.seq > (SELECT COALESCE(MAX(seq), 0) FROM journal WHERE section_id = ?1 AND kind = 'result')
+            ORDER BY u.seq DESC LIMIT 1
+        ''', (section_id,)).fetchone()
+        if entry is None:
+            return None
+        db.execute('UPDATE journal SET undone = 0 WHERE seq = ?', (entry['seq'],))
+        return _apply_board_change(db, section_id, 'redo', entry, entry['old_result'], entry['new_result'])
+
+def recover_section_in_db(section_id):
+    """
+    Rebuilds a section's points from its latest snapshot and the journal
+    entries after it, and sets every journaled board back to the result of
+    its latest entry. Returns how many players' points had to be corrected.
+    """
+    db = get_db()
+    with db:
+        db.execute('BEGIN IMMEDIATE')
+        snapshot = db.execute(
+            'SELECT seq, points FROM snapshots WHERE section_id = ? ORDER BY seq DESC LIMIT 1', (section_id,)
+        ).fetchone()
+        points = defaultdict(float)
+        seq = 0
+        if snapshot is not None:
+            seq = snapshot['seq']
+            points.update(json.loads(snapshot['points']))
+
+        for entry in db.execute(
+            'SELECT kind, table_no, player1_SrNo, player2_SrNo, old_result, new_result FROM journal '
+            'WHERE section_id = ? AND seq > ? ORDER BY seq',
+            (section_id, seq)
+        ):
+            if entry['kind'] == 'bye':
+                # Entries from before byes had results carry none: a full point
+                points[entry['player1_SrNo']] += BYE_POINTS[entry['new_result'] or 'pending']
+            elif entry['kind'] in ('result', 'undo', 'redo'):
+                old_p1, old_p2 = RESULT_POINTS.get(entry['old_result'], (0.0, 0.0))
+                new_p1, new_p2 = RESULT_POINTS.get(entry['new_result'], (0.0, 0.0))
+                points[entry['player1_SrNo']] += new_p1 - old_p1
+                points[entry['player2_SrNo']] += new_p2 - old_p2
+        # Snapshots only hold points, so board results come from the whole journal
+        results = db.execute('''
+            SELECT table_no, new_result FROM journal WHERE seq IN (
+                SELECT MAX(seq) FROM journal WHERE section_id = ? AND table_no IS NOT NULL GROUP BY table_no)
+        ''', (section_id,)).fetchall()
+
+        corrections = [
+            (points[row['SrNo']], row['SrNo'])
+            for row in db.execute('SELECT SrNo, points FROM players WHERE section_id = ?', (section_id,))
+            if row['points'] != points[row['SrNo']]
+        ]
+        db.executemany('UPDATE players SET points = ? WHERE SrNo = ?', corrections)
+        replayed = db.executemany('UPDATE pairings SET result = ?1 WHERE Table_No = ?2 AND result IS NOT ?1',
+                                  [(result, table_no) for table_no, result in results]).rowcount
+        if corrections or replayed > 0:
+            _bump_version(db, section_id)
+    return len(corrections)
+
+def recover_db():
+    """Runs recover_section_in_db for every section. Returns {section_id: corrections} where any were made."""
     db = get_db()
-    latest_round = get_latest_round_number()
-    if latest_round > 0:
-        db.execute("UPDATE pairings SET result = '0-0' WHERE round_number = ? AND result = 'pending' AND player2_SrNo IS NOT NULL", (latest_round,))
-        db.commit()
+    corrected = {}
+    for (section_id,) in db.execute('SELECT id FROM sections').fetchall():
+        count = recover_section_in_db(section_id)
+        if count:
+            corrected[section_id] = count
+    return corrected
 
-def reset_tournament_in_db():
+# --- BOARD EVENTS ---
+# Events for the live pairings board (see events.py) go through the database
+# so that every worker process sees the events published by the others.
+
+def add_board_event(event, data):
+    """Appends a board event (data as JSON text) and drops the oldest ones. Returns its seq."""
+    db = get_db()
+    with db:
+        seq = db.execute('INSERT INTO board_events (event, data) VALUES (?, ?)', (event, data)).lastrowid
+        db.execute('DELETE FROM board_events WHERE seq <= ?', (seq - BOARD_EVENTS_KEPT,))
+    return seq
+
+def get_last_board_event_seq():
     db = get_db()
-    db.execute('DELETE FROM pairings')
-    db.execute('DELETE FROM players')
-    db.execute("DELETE FROM sqlite_sequence WHERE name IN ('players', 'pairings')")
-    db.commit()
+    return db.execute('SELECT COALESCE(MAX(seq), 0) FROM board_events').fetchone()[0]
+
+def get_board_events_after(seq):
+    """Board events newer than seq as (seq, event, data), oldest first."""
+    db = get_db()
+    return [tuple(row) for row in db.execute(
+        'SELECT seq, event, data FROM board_events WHERE seq > ? ORDER BY seq', (seq,)
+    )]
 
 # --- HISTORY / ARCHIVE FUNCTIONS ---
 
-def save_tournament_to_history(tournament_name, final_standings):
-    """Saves the current tournament standings to the history tables."""
-    db = get_db()
-    cursor = db.cursor()
-    
-    # 1. Create Tournament Entry
-    cursor.execute('INSERT INTO tournaments (name) VALUES (?)', (tournament_name,))
-    tournament_id = cursor.lastrowid
-    
-    # 2. Save each player's final stats
-    # final_standings is expected to be a list of dicts with 'name', 'rating', 'points', 'buchholz'
-    for rank, player in enumerate(final_standings, 1):
-        cursor.execute('''
+def save_tournament_to_history(tournament_name, final_standings, games=()):
+    """
+    Saves a tournament's final standings and game record to the history
+    tables in one transaction. final_standings is a list of dicts with
+    'name', 'rating', 'points' and 'buchholz'; games is an iterable of
+    (round, table, white, black, result) rows, black None for a bye.
+    """
+    db = get_db()
+    games = [list(game) for game in games]
+    data = zlib.compress(json.dumps(games, separators=(',', ':')).encode())
+    with db:
+        cursor = db.execute('INSERT INTO tournaments (name) VALUES (?)', (tournament_name,))
+        tournament_id = cursor.lastrowid
+        db.executemany('''
             INSERT INTO history_standings (tournament_id, rank, name, rating, points, buchholz)
             VALUES (?, ?, ?, ?, ?, ?)
-        ''', (tournament_id, rank, player['name'], player['rating'], player['points'], player['buchholz']))
-    
-    db.commit()
+        ''', ((tournament_id, rank, p['name'], p['rating'], p['points'], p['buchholz'])
+              for rank, p in enumerate(final_standings, 1)))
+        db.execute('INSERT INTO tournament_games (tournament_id, games, data) VALUES (?, ?, ?)',
+                   (tournament_id, len(games), data))
     return tournament_id
 
-def get_all_tournaments():
-    """Returns a list of all past tournaments."""
+def get_archived_games(tournament_id):
+    """An archived tournament's games as (round, table, white, black, result) lists, or None if not kept."""
+    db = get_db()
+    row = db.execute('SELECT data FROM tournament_games WHERE tournament_id = ?', (tournament_id,)).fetchone()
+    if row is None:
+        return None
+    return json.loads(zlib.decompress(row['data']))
+
+def get_tournaments_page(before=None, limit=25):
+    """
+    One page of past tournaments, newest first. before is the id of the last
+    tournament on the previous page: keyset pagination, so every page is an
+    index range scan however deep it is. Returns (rows, next_before), with
+    next_before None on the last page.
+    """
+    db = get_db()
+    if before is None:
+        rows = db.execute('SELECT * FROM tournaments ORDER BY date_concluded DESC, id DESC LIMIT ?',
+                          (limit + 1,)).fetchall()
+    else:
+        rows = db.execute('''
+            SELECT * FROM tournaments
+            WHERE (date_concluded, id) < (SELECT date_concluded, id FROM tournaments WHERE id = ?)
+            ORDER BY date_concluded DESC, id DESC LIMIT ?
+        ''', (before, limit + 1)).fetchall()
+    next_before = rows[limit - 1]['id'] if len(rows) > limit else None
+    return rows[:limit], next_before
+
+def count_tournaments():
+    db = get_db()
+    return db.execute('SELECT COUNT(*) FROM tournaments').fetchone()[0]
+
+def _fts_query(text):
+    # Every word of free text as a quoted prefix term, so FTS5 syntax in the input is inert
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+def search_tournaments(text, limit=50):
+    """Past tournaments whose name matches every word of text (as prefixes), newest first."""
+    query = _fts_query(text)
+    if not query:
+        return []
+    db = get_db()
+    return db.execute('''
+        SELECT t.* FROM tournaments_fts f JOIN tournaments t ON t.id = f.rowid
+        WHERE tournaments_fts MATCH ?
+        ORDER BY t.date_concluded DESC, t.id DESC LIMIT ?
+    ''', (query, limit)).fetchall()
+
+def search_player_names(text, limit=50):
+    """Distinct archived player names matching text, with how many tournaments each played."""
+    query = _fts_query(text)
+    if not query:
+        return []
+    db = get_db()
+    return db.execute('''
+        SELECT h.name, COUNT(*) as tournaments
+        FROM history_standings_fts f JOIN history_standings h ON h.id = f.rowid
+        WHERE history_standings_fts MATCH ?
+        GROUP BY h.name COLLATE NOCASE
+        ORDER BY tournaments DESC, h.name LIMIT ?
+    ''', (query, limit)).fetchall()
+
+def get_player_history(name):
+    """Every archived result of a player (name matched case-insensitively), newest first."""
     db = get_db()
-    return db.execute('SELECT * FROM tournaments ORDER BY date_concluded DESC').fetchall()
+    return db.execute('''
+        SELECT t.id as tournament_id, t.name as tournament_name, t.date_concluded,
+               h.rank, h.name, h.rating, h.points, h.buchholz
+        FROM history_standings h
+        JOIN tournaments t ON t.id = h.tournament_id
+        WHERE h.name = ? COLLATE NOCASE
+        ORDER BY t.date_concluded DESC, t.id DESC
+    ''', (name,)).fetchall()
 
 def get_tournament_details(tournament_id):
-    """Returns the metadata for a specific tournament."""
+    """Returns the metadata for a specific tournament, with games None when no game record was kept."""
+    db = get_db()
+    return db.execute('''
+        SELECT t.*, tg.games FROM tournaments t
+        LEFT JOIN tournament_games tg ON tg.tournament_id = t.id
+        WHERE t.id = ?
+    ''', (tournament_id,)).fetchone()
+
+def iter_tournament_standings(tournament_id):
+    return iter_query('SELECT * FROM history_standings WHERE tournament_id = ? ORDER BY rank ASC', (tournament_id,))
+
+def iter_all_archived_standings():
+    """Standings of every archived tournament, tournament by tournament."""
+    return iter_query('''
+        SELECT t.id as tournament_id, t.name as tournament_name, t.date_concluded,
+               h.rank, h.name, h.rating, h.points, h.buchholz
+        FROM history_standings h
+        JOIN tournaments t ON t.id = h.tournament_id
+        ORDER BY h.tournament_id, h.rank
+    ''')
+
+def get_archived_standings_page(tournament_id, after=0, limit=100):
+    """A past tournament's standings below rank after (keyset pagination on the rank index)."""
     db = get_db()
-    return db.execute('SELECT * FROM tournaments WHERE id = ?', (tournament_id,)).fetchone()
+    return db.execute(
+        'SELECT rank, name, rating, points, buchholz FROM history_standings '
+        'WHERE tournament_id = ? AND rank > ? ORDER BY rank LIMIT ?',
+        (tournament_id, after, limit)
+    ).fetchall()
 
 def get_tournament_standings(tournament_id):
     """Returns the full standings for a specific past tournament."""
@@ -0,0 +1,107 @@
+"""
+Server-sent events for the public pairings board.
+
+Routes that change the board publish a small event (a new round, one
+board's result, a concluded round) and every open browser gets it over a
+long-lived text/event-stream response, instead of each one reloading the
+page and re-running its queries. Events are appended to the board_events
+table rather than handed to the local subscribers, so a browser connected
+to any worker process gets the events published by every other one: while
+a process has subscribers, one watcher thread polls the table every
+POLL_SECONDS and broadcasts what is new.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from flask import current_app
+from . import db
+
+# Events buffered per subscriber before it is considered too slow to keep up.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Seconds between keep-alive comments, so proxies do not close idle streams.
+KEEPALIVE_SECONDS = 15
+
+# Seconds between the watcher's checks for new events.
+POLL_SECONDS = 0.5
+
+RELOAD_MESSAGE = 'event: reload\ndata: {}\n\n'
+
+
+class EventBroker:
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.watcher = None
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.add(subscriber)
+            if self.watcher is None:
+                self.watcher = threading.Thread(target=self._watch, name='board-events', daemon=True)
+                self.watcher.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def broadcast(self, message):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # The client fell behind; tell it to reload the whole board.
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait(RELOAD_MESSAGE)
+
+    def _watch(self):
+        # Runs until the last subscriber is gone; the next one starts a new watcher.
+        with self.app.app_context():
+            last = db.get_last_board_event_seq()
+        while True:
+            time.sleep(POLL_SECONDS)
+            with self.lock:
+                if not self.subscribers:
+                    self.watcher = None
+                    return
+            try:
+                with self.app.app_context():
+                    rows = db.get_board_events_after(last)
+            except sqlite3.Error:
+                self.app.logger.exception('Reading board events failed')
+                continue
+            if rows and rows[0][0] > last + 1:
+                # Events were pruned before this process read them
+                self.broadcast(RELOAD_MESSAGE)
+            for seq, event, data in rows:
+                self.broadcast(f'event: {event}\ndata: {data}\n\n')
+                last = seq
+
+    def stream(self, subscriber):
+        """Yields SSE messages for one subscriber until the client disconnects."""
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    yield subscriber.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def get_broker():
+    return current_app.extensions.setdefault('event_broker', EventBroker(current_app._get_current_object()))
+
+
+def publish(event, **data):
+    """Publishes a board event to the browsers of every worker process."""
+    db.add_board_event(event, json.dumps(data, separators=(',', ':')))
@@ -0,0 +1,173 @@
+"""
+Background pairing jobs.
+
+Generating the next round pairs every ready section of an event. When the
+sections together have PAIRING_JOB_THRESHOLD players or more, each section
+is handed to a process pool, so sections are paired in parallel across
+cores and generate_pairings returns at once with a job id that the
+arbiter's page polls. Workers only compute pairings from a pickled
+TournamentState. Each section's pairings and bye point are committed in one
+transaction by the web process as soon as that section is done.
+
+Only one job per database, section and round runs at a time in a process,
+and db.add_round_to_db refuses to write a round that already exists, which
+covers several worker processes racing for the same round.
+"""
+import multiprocessing
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from . import db, events, page_cache, pairing_logic, standings_cache
+
+# Finished jobs whose status can still be looked up.
+FINISHED_JOBS_KEPT = 50
+
+
+def compute_pairings(state, round_number, engine):
+    """Runs in a worker process: the pairings for round_number as (p1, p2) SrNo tuples."""
+    if round_number == 1:
+        return pairing_logic.generate_first_round_pairs(state)
+    return pairing_logic.generate_swiss_pairs(state, engine=engine)
+
+
+def commit_round(section_id, pairings, round_number, bye_results=None):
+    """
+    Writes a section's generated round and tells the caches and the board
+    about it. bye_results is passed on to db.add_round_to_db.
+    """
+    byes, version = db.add_round_to_db(section_id, pairings, round_number, bye_results)
+    standings_cache.record_round(section_id, version, byes)
+    page_cache.bump_version('board')
+    events.publish('round', round=round_number, section=section_id)
+
+
+class PairingJob:
+    def __init__(self, keys, rounds):
+        self.id = uuid.uuid4().hex
+        self.keys = keys
+        # section_id -> round number being paired
+        self.rounds = rounds
+        self.remaining = len(rounds)
+        self.errors = []
+        self.status = 'running'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'rounds': {str(section_id): round_number for section_id, round_number in self.rounds.items()},
+            'status': self.status,
+            'error': '; '.join(self.errors) or None,
+        }
+
+
+class JobRunner:
+    def __init__(self, max_workers=None):
+        self.lock = threading.Lock()
+        self.max_workers = max_workers
+        self.executor = None
+        self.jobs = OrderedDict()
+        self.active = {}
+
+    def get_executor(self):
+        # Spawned rather than forked workers: forking a threaded web server
+        # can copy locks held by other threads into the child.
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+            return self.executor
+
+    def discard_broken_pool(self, error):
+        # A worker died; the next job starts a fresh pool.
+        if isinstance(error, BrokenProcessPool):
+            with self.lock:
+                self.executor = None
+
+    def _claim(self, sections):
+        database = current_app.config['DATABASE']
+        rounds = {section_id: round_number for section_id, _, round_number in sections}
+        keys = [(database, section_id, round_number) for section_id, round_number in rounds.items()]
+        with self.lock:
+            for key in keys:
+                if key in self.active:
+                    raise ValueError(f'Round {key[2]} pairings are already being generated.')
+            job = PairingJob(keys, rounds)
+            for key in keys:
+                self.active[key] = job
+            self.jobs[job.id] = job
+            while len(self.jobs) > FINISHED_JOBS_KEPT:
+                oldest = next(iter(self.jobs))
+                if self.jobs[oldest].status == 'running':
+                    break
+                del self.jobs[oldest]
+        return job
+
+    def _section_done(self, job, error=None, remaining=1):
+        with self.lock:
+            if error is not None:
+                job.errors.append(error)
+            job.remaining -= remaining
+            if job.remaining == 0:
+                job.status = 'failed' if job.errors else 'done'
+                for key in job.keys:
+                    self.active.pop(key, None)
+
+    def run_inline(self, sections, engine):
+        """
+        Pairs and commits each (section_id, state, round_number) in the
+        calling request. A section that cannot be written is reported in the
+        job's errors and does not stop the others.
+        """
+        job = self._claim(sections)
+        try:
+            for section_id, state, round_number in sections:
+                try:
+                    commit_round(section_id, compute_pairings(state, round_number, engine), round_number)
+                except ValueError as e:
+                    self._section_done(job, str(e))
+                else:
+                    self._section_done(job)
+        except Exception as e:
+            self._section_done(job, str(e), remaining=job.remaining)
+            raise
+        return job
+
+    def submit(self, sections, engine):
+        """Starts pairing every (section_id, state, round_number) in the process pool and returns the job."""
+        job = self._claim(sections)
+        app = current_app._get_current_object()
+        for section_id, state, round_number in sections:
+            try:
+                future = self.get_executor().submit(compute_pairings, state, round_number, engine)
+            except Exception as e:
+                self.discard_broken_pool(e)
+                self._section_done(job, str(e))
+                continue
+            future.add_done_callback(
+                lambda f, section_id=section_id, round_number=round_number:
+                    self._finish(app, job, section_id, round_number, f))
+        return job
+
+    def _finish(self, app, job, section_id, round_number, future):
+        # Called on the executor's thread once a worker returns.
+        try:
+            pairings = future.result()
+            with app.app_context():
+                commit_round(section_id, pairings, round_number)
+        except Exception as e:
+            app.logger.exception('Pairing job %s failed for section %d round %d', job.id, section_id, round_number)
+            self.discard_broken_pool(e)
+            self._section_done(job, str(e))
+        else:
+            self._section_done(job)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+
+def get_runner():
+    return current_app.extensions.setdefault('pairing_jobs', JobRunner(current_app.config['PAIRING_WORKERS']))
@@ -0,0 +1,225 @@
+"""
+Opt-in request, SQL and pairing instrumentation.
+
+With METRICS_ENABLED set, get_db hands out an InstrumentedConnection that
+counts and times every statement and commit, the pairing_logic entry points
+are timed, and every request's latency is recorded per endpoint. Everything
+is exposed in Prometheus text format on /metrics, and requests slower than
+SLOW_REQUEST_MS are logged with their query breakdown.
+
+Metrics are kept per process, like the other in-process caches.
+"""
+import functools
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from flask import Blueprint, Response, current_app, g, has_app_context, request
+
+bp = Blueprint('metrics', __name__)
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statements listed per slow request.
+SLOW_LOG_TOP_QUERIES = 10
+
+# Set by init_app; checked by the function timers, which run without an app.
+enabled = False
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # metric name -> label value -> Histogram
+        self.histograms = defaultdict(lambda: defaultdict(Histogram))
+        # metric name -> label value -> count
+        self.counters = defaultdict(lambda: defaultdict(int))
+
+    def observe(self, metric, label, value):
+        with self.lock:
+            self.histograms[metric][label].observe(value)
+
+    def increment(self, metric, label, amount=1):
+        with self.lock:
+            self.counters[metric][label] += amount
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+registry = Registry()
+
+# metric name -> (label name, help text)
+HISTOGRAMS = {
+    'chess_request_duration_seconds': ('endpoint', 'Request latency by endpoint.'),
+    'chess_sql_duration_seconds': ('statement', 'SQL statement latency by statement type.'),
+    'chess_function_duration_seconds': ('function', 'Pairing and standings function latency.'),
+}
+COUNTERS = {
+    'chess_request_queries_total': ('endpoint', 'SQL statements issued, by endpoint.'),
+    'chess_requests_total': ('endpoint', 'Requests served, by endpoint.'),
+}
+
+
+def _record_query(sql, seconds):
+    statement = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else 'UNKNOWN'
+    registry.observe('chess_sql_duration_seconds', statement, seconds)
+    if has_app_context() and 'query_log' in g:
+        g.query_log.append((' '.join(sql.split()), seconds))
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - start)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection factory that times statements and commits."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            _record_query('SCRIPT', time.perf_counter() - start)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            _record_query('COMMIT', time.perf_counter() - start)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # 'with db:' commits or rolls back in C, without calling commit()
+        start = time.perf_counter()
+        try:
+            return super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            _record_query('COMMIT' if exc_type is None else 'ROLLBACK', time.perf_counter() - start)
+
+
+def timed(function):
+    """Records the duration of a function call when metrics are enabled."""
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapped(*args, **kwargs):
+        if not enabled:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            registry.observe('chess_function_duration_seconds', name, time.perf_counter() - start)
+    return wrapped
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.query_log = []
+
+
+def _finish_request(response):
+    if 'request_started' not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    endpoint = request.endpoint or 'unknown'
+    registry.observe('chess_request_duration_seconds', endpoint, elapsed)
+    registry.increment('chess_requests_total', endpoint)
+    registry.increment('chess_request_queries_total', endpoint, len(g.query_log))
+
+    if elapsed * 1000 >= current_app.config['SLOW_REQUEST_MS']:
+        breakdown = defaultdict(lambda: [0, 0.0])
+        for sql, seconds in g.query_log:
+            breakdown[sql][0] += 1
+            breakdown[sql][1] += seconds
+        top = sorted(breakdown.items(), key=lambda item: item[1][1], reverse=True)[:SLOW_LOG_TOP_QUERIES]
+        lines = [f'  {count}x {seconds * 1000:.1f} ms  {sql[:120]}' for sql, (count, seconds) in top]
+        current_app.logger.warning(
+            'Slow request %s %s: %.1f ms, %d queries (%.1f ms in SQL)\n%s',
+            request.method, request.path, elapsed * 1000, len(g.query_log),
+            sum(seconds for _, seconds in g.query_log) * 1000, '\n'.join(lines))
+    return response
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus():
+    """Renders the registry in the Prometheus text exposition format."""
+    lines = []
+    with registry.lock:
+        for metric, (label, help_text) in HISTOGRAMS.items():
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} histogram')
+            for value, histogram in sorted(registry.histograms.get(metric, {}).items()):
+                labels = f'{label}="{_escape(value)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.total}')
+                lines.append(f'{metric}_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{{labels}}} {histogram.total}')
+        for metric, (label, help_text) in COUNTERS.items():
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for value, count in sorted(registry.counters.get(metric, {}).items()):
+                lines.append(f'{metric}{{{label}="{_escape(value)}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    if not current_app.config['METRICS_ENABLED']:
+        return 'Metrics are disabled.', 404
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    global enabled
+    app.register_blueprint(bp)
+    if app.config['METRICS_ENABLED']:
+        enabled = True
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
@@ -0,0 +1,132 @@
+"""
+Conditional GET support and a rendered-page cache for the public pages.
+
+Each cached page belongs to a scope ('board' for pairings, 'history' for the
+archive list). A scope's version is the modification time of a small file in
+the instance folder, bumped by the routes that change what the scope shows.
+Reading it is a stat() call, so unchanged pages are answered with 304 or
+from the cache without opening the database, and every worker process on
+the machine sees the same version. Archived tournaments never change, so
+their pages are cached with no version at all.
+"""
+import functools
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from hashlib import blake2b
+from flask import current_app, g, make_response, request, session
+
+# Rendered pages kept per process (least recently used are dropped first).
+MAX_CACHED_PAGES = 256
+
+# Version value for scopes whose pages never change.
+IMMUTABLE = 'immutable'
+
+
+def _version_path(scope):
+    return os.path.join(current_app.instance_path, f'{scope}.version')
+
+
+def get_version(scope):
+    """Returns the current version (nanosecond mtime) of a scope."""
+    path = _version_path(scope)
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        bump_version(scope)
+        return os.stat(path).st_mtime_ns
+
+
+def bump_version(scope):
+    """Marks every page in the scope as changed."""
+    path = _version_path(scope)
+    with open(path, 'a'):
+        pass
+    try:
+        # Guarantee a new value even when two bumps land within the
+        # filesystem's timestamp resolution.
+        previous = os.stat(path).st_mtime_ns
+        os.utime(path, ns=(previous, max(previous + 1, _now_ns())))
+    except FileNotFoundError:
+        pass
+
+
+def _now_ns():
+    return int(datetime.now(timezone.utc).timestamp() * 1_000_000_000)
+
+
+class PageCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pages = OrderedDict()
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.pages.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self.pages.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, body):
+        with self.lock:
+            self.pages[key] = (version, body)
+            self.pages.move_to_end(key)
+            while len(self.pages) > MAX_CACHED_PAGES:
+                self.pages.popitem(last=False)
+
+
+def _get_cache():
+    return current_app.extensions.setdefault('page_cache', PageCache())
+
+
+def cached_page(scope=None):
+    """
+    Serves a view with ETag/Last-Modified validators and caches the
+    rendered body until the scope's version changes. scope=None marks the
+    page as immutable. Requests carrying flash messages bypass the cache.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(**kwargs):
+            if session.get('_flashes'):
+                return view(**kwargs)
+
+            version = get_version(scope) if scope else IMMUTABLE
+            user_id = g.user['id'] if g.user else None
+            key = (request.full_path, user_id)
+            digest = blake2b(repr((scope, version, key)).encode(), digest_size=12).hexdigest()
+            last_modified = None
+            if scope:
+                last_modified = datetime.fromtimestamp(version // 1_000_000_000, timezone.utc)
+
+            def finish(response):
+                response.set_etag(digest)
+                response.vary.add('Cookie')
+                if last_modified:
+                    response.last_modified = last_modified
+                privacy = 'private' if user_id else 'public'
+                if scope:
+                    response.headers['Cache-Control'] = f'{privacy}, no-cache'
+                else:
+                    response.headers['Cache-Control'] = f'{privacy}, max-age=31536000, immutable'
+                return response
+
+            # Only the ETag decides on a 304: Last-Modified has one-second
+            # resolution and two changes can land within the same second.
+            if request.if_none_match.contains(digest):
+                return finish(make_response('', 304))
+
+            cache = _get_cache()
+            body = cache.get(key, version)
+            if body is None:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+                cache.put(key, version, (response.get_data(), response.content_type))
+                return finish(response)
+            return finish(make_response(body[0], {'Content-Type': body[1]}))
+
+        return wrapped
+    return decorator
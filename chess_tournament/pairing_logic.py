@@ -1,9 +1,38 @@
 import random
 from collections import defaultdict
+from operator import itemgetter
+from .matching import max_weight_matching
+from .metrics import timed
+from .tournament_state import RESULT_POINTS, TournamentState
+from .tiebreaks import DEFAULT_TIEBREAK_ORDER, compute_tiebreaks
 
+# Cost model for the matching engine. Edge weights are maximised, so each
+# term is subtracted from a large base weight. Score difference dominates,
+# then who floats down, then the top-half/bottom-half placement.
+SCORE_DIFF_COST = 1_000_000
+FLOAT_BONUS = 200
+PLACEMENT_COST = 1
+BASE_WEIGHT = 1_000_000_000
+
+# Score groups are merged (or split) into brackets of about this many
+# players, so each matching stays small even in a 5,000-player open.
+DEFAULT_BRACKET_SIZE = 32
+
+# Only candidates within this many places of a player's neighbours or of
+# their ideal top-half/bottom-half opponent get an edge. This keeps the
+# matching graph sparse; floaters fall back to a dense pass.
+CANDIDATE_WINDOW = 8
+
+def _as_rows(players):
+    # The row-based functions also accept a TournamentState.
+    if isinstance(players, TournamentState):
+        return players.to_rows()
+    return players
+
+@timed
 def generate_first_round_pairs(players):
     """Generates random pairings for the first round."""
-    shuffled_players = list(players)
+    shuffled_players = list(_as_rows(players))
     random.shuffle(shuffled_players)
     
     if len(shuffled_players) % 2 != 0:
@@ -23,8 +52,32 @@ def generate_first_round_pairs(players):
     return pairings
 
 
-def generate_swiss_pairs(players, history):
-    """Generates pairings for subsequent rounds using Swiss-system logic."""
+@timed
+def generate_swiss_pairs(players, history=None, engine='matching', byes=None):
+    """
+    Generates pairings for subsequent rounds using Swiss-system logic.
+    players is a list of rows or a TournamentState (which already carries
+    the history and byes). engine selects the pairing engine from
+    PAIRING_ENGINES; byes is the set of SrNos that already received a bye
+    (only used by 'matching').
+    """
+    if engine not in PAIRING_ENGINES:
+        raise ValueError(f"Unknown pairing engine '{engine}'.")
+    return PAIRING_ENGINES[engine](players, history, byes=byes)
+
+
+def generate_greedy_swiss_pairs(players, history=None, byes=None):
+    """Fast fallback: greedy top-down pass over the score groups."""
+    if isinstance(players, TournamentState):
+        # Rematch checks go straight to the state's index, no SrNo pair set is built
+        state = players
+        index = state.index
+        players = state.to_rows()
+        def is_rematch(a, b):
+            return state.has_played(index[a], index[b])
+    else:
+        def is_rematch(a, b):
+            return ((a, b) if a < b else (b, a)) in history
     score_groups = defaultdict(list)
     for player in players:
         score_groups[player['points']].append(player)
@@ -44,8 +97,7 @@ def generate_swiss_pairs(players, history):
             p1 = group.pop(0)
             opponent_found = False
             for i, p2 in enumerate(group):
-                matchup = tuple(sorted((p1['SrNo'], p2['SrNo'])))
-                if matchup not in history:
+                if not is_rematch(p1['SrNo'], p2['SrNo']):
                     pairings.append((p1['SrNo'], p2['SrNo']))
                     group.pop(i)
                     opponent_found = True
@@ -62,39 +114,177 @@ def generate_swiss_pairs(players, history):
 
     return pairings
 
-def calculate_standings_with_tiebreaks(players, matches):
+
+def _score_units(points):
+    # Scores move in half points; work in integer half points.
+    return int(round(points * 2))
+
+
+def _build_brackets(state, ordered, bracket_size):
+    """Merges small score groups and splits large ones into brackets of player indices."""
+    points = state.points
+    brackets = []
+    current = []
+    i = 0
+    while i < len(ordered):
+        j = i
+        while j < len(ordered) and points[ordered[j]] == points[ordered[i]]:
+            j += 1
+        group = ordered[i:j]
+        i = j
+        if len(group) > bracket_size:
+            if current:
+                brackets.append(current)
+                current = []
+            # Keep slices even so a split group does not create floaters.
+            step = bracket_size - bracket_size % 2
+            for k in range(0, len(group), step):
+                brackets.append(group[k:k + step])
+            continue
+        current.extend(group)
+        if len(current) >= bracket_size:
+            brackets.append(current)
+            current = []
+    if current:
+        brackets.append(current)
+    return brackets
+
+
+def _match_bracket(state, nodes, allow_rematch=False, bye_weights=None, window=None):
     """
-    Calculates Tiebreaks (Buchholz) for each player.
-    Buchholz = Sum of scores of all opponents played.
-    Returns a list of dicts with updated player stats.
+    Runs one weighted matching over a bracket of player indices.
+    Returns (pairs, unpaired) with pairs as SrNo tuples.
+    bye_weights maps node position -> weight of the edge to a virtual bye node.
+    window limits edges to nearby candidates (None means all pairs).
     """
-    # 1. Create a dictionary for quick score lookup: {player_id: score}
-    player_scores = {p['SrNo']: p['points'] for p in players}
-    
-    # 2. Build a map of opponents: {player_id: [list_of_opponent_ids]}
-    opponents_map = defaultdict(list)
-    
-    for m in matches:
-        p1, p2 = m['player1_SrNo'], m['player2_SrNo']
-        # Add each other to their opponents list
-        opponents_map[p1].append(p2)
-        if p2 is not None:
-            opponents_map[p2].append(p1)
-
-    # 3. Calculate Buchholz and convert rows to mutable dicts
-    final_standings = []
-    for p in players:
-        p_dict = dict(p) # Convert sqlite3.Row to dict to add new fields
-        p_id = p_dict['SrNo']
-        
-        # Calculate Buchholz: Sum of opponents' scores
-        opponents = opponents_map.get(p_id, [])
-        buchholz_score = sum(player_scores.get(oid, 0) for oid in opponents)
-        
-        p_dict['buchholz'] = buchholz_score
-        final_standings.append(p_dict)
+    n = len(nodes)
+    half = n // 2
+    units = [_score_units(state.points[v]) for v in nodes]
+    edges = []
+    for i in range(n):
+        for j in range(i + 1, n):
+            if window is not None and j - i > window and abs(j - i - half) > window:
+                continue
+            rematch = state.has_played(nodes[i], nodes[j])
+            if rematch and not allow_rematch:
+                continue
+            diff = units[i] - units[j]
+            weight = (BASE_WEIGHT
+                      - SCORE_DIFF_COST * diff * diff
+                      + FLOAT_BONUS * (2 * n - i - j)
+                      - PLACEMENT_COST * abs(j - i - half))
+            if rematch:
+                weight -= BASE_WEIGHT // 2
+            edges.append((i, j, weight))
+    if bye_weights:
+        edges.extend((i, n, w) for i, w in bye_weights.items())
+
+    mate = max_weight_matching(edges, maxcardinality=True) if edges else []
+    mate += [-1] * (n + 1 - len(mate))
+
+    sr_nos = state.sr_nos
+    pairs = []
+    unpaired = []
+    for i in range(n):
+        m = mate[i]
+        if m == n:
+            pairs.append((sr_nos[nodes[i]], None))
+        elif m == -1:
+            unpaired.append(nodes[i])
+        elif m > i:
+            pairs.append((sr_nos[nodes[i]], sr_nos[nodes[m]]))
+    return pairs, unpaired
+
+
+def _bye_weights(state, nodes, byes, lowest_units):
+    """Bye edges: cheaper for low scores and low ranks, none after a bye."""
+    weights = {}
+    for i, v in enumerate(nodes):
+        if v in byes:
+            continue
+        diff = _score_units(state.points[v]) - lowest_units
+        weights[i] = BASE_WEIGHT - SCORE_DIFF_COST * diff * diff + FLOAT_BONUS * i
+    return weights
+
+
+def generate_matching_swiss_pairs(players, history=None, byes=None,
+                                  bracket_size=DEFAULT_BRACKET_SIZE):
+    """
+    Pairs a Swiss round with maximum-weight matching (blossom algorithm).
+
+    Players are ordered by points and rating and cut into brackets of about
+    bracket_size. Each bracket is matched on its own with rematches banned,
+    and players left over float down into the next bracket. Byes go to the
+    lowest-placed player who has not had one yet.
+    """
+    if isinstance(players, TournamentState):
+        state = players
+    else:
+        state = TournamentState(players, ((p1, p2, 'pending') for p1, p2 in history or ()), byes or ())
+    if not len(state):
+        return []
+    ordered = sorted(range(len(state)), key=lambda i: (state.points[i], state.ratings[i]), reverse=True)
+    lowest_units = _score_units(state.points[ordered[-1]])
+    needs_bye = len(ordered) % 2 == 1
+
+    brackets = _build_brackets(state, ordered, bracket_size)
+    pairings = []
+    floaters = []
+    for index, bracket in enumerate(brackets):
+        nodes = floaters + bracket
+        last = index == len(brackets) - 1
+        bye_weights = _bye_weights(state, nodes, state.byes, lowest_units) if last and needs_bye else None
+        pairs, unpaired = _match_bracket(state, nodes, bye_weights=bye_weights,
+                                         window=CANDIDATE_WINDOW)
+        if len(unpaired) > 1:
+            # The sparse graph was too thin here; retry with every candidate.
+            pairs, unpaired = _match_bracket(state, nodes, bye_weights=bye_weights)
+        pairings.extend(pairs)
+        floaters = unpaired
+
+    if floaters:
+        # Nothing legal is left for these players: allow rematches as a last
+        # resort, and hand out the bye regardless of earlier byes.
+        has_bye = any(p2 is None for _, p2 in pairings)
+        bye_weights = None
+        if not has_bye and len(floaters) % 2 == 1:
+            bye_weights = _bye_weights(state, floaters, set(), lowest_units)
+        pairs, floaters = _match_bracket(state, floaters, allow_rematch=True,
+                                         bye_weights=bye_weights)
+        pairings.extend(pairs)
+
+    return pairings
+
+
+PAIRING_ENGINES = {
+    'matching': generate_matching_swiss_pairs,
+    'greedy': generate_greedy_swiss_pairs,
+}
+
+@timed
+def calculate_standings_with_tiebreaks(players, matches=None, order=DEFAULT_TIEBREAK_ORDER, byes=()):
+    """
+    Calculates Tiebreaks for each player (see tiebreaks.TIEBREAKS).
+    Buchholz = Sum of scores of all opponents played, always included.
+    players is a list of rows (with matches the finished games and byes the
+    (SrNo, round) byes) or a TournamentState. Returns a list of dicts with
+    updated player stats, sorted by points then the tiebreaks in order.
+    """
+    # 1. Build the compact state: score columns plus the game columns
+    if isinstance(players, TournamentState):
+        state = players
+        final_standings = state.to_rows()
+    else:
+        players = list(players)
+        state = TournamentState.from_rows(players, matches or (), byes)
+        final_standings = [dict(p) for p in players] # Convert sqlite3.Row to dict to add new fields
+
+    # 2. Calculate every tiebreak in one pass over the games each
+    for name, values in compute_tiebreaks(state, order).items():
+        for p_dict, value in zip(final_standings, values):
+            p_dict[name] = value
 
-    # 4. Sort by: Points (Desc) -> Buchholz (Desc) -> Rating (Desc)
-    final_standings.sort(key=lambda x: (x['points'], x['buchholz'], x['rating']), reverse=True)
+    # 3. Sort by: Points (Desc) -> Tiebreaks in order (Desc) -> Rating (Desc)
+    final_standings.sort(key=itemgetter('points', *order, 'rating'), reverse=True)
     
-    return final_standings
\ No newline at end of file
+    return final_standings
@@ -0,0 +1,157 @@
+"""
+Monte Carlo projection of a section's final standings.
+
+The rest of the section is played out many times over: pending boards of
+the current round get a result, then every remaining round is paired with
+the normal pairing functions and each game is decided by a draw from the
+players' Elo expected score. Counting where every player finishes across
+the runs gives the probability of each final rank.
+
+Runs are split into chunks with their own seeds and spread over the pairing
+process pool (see jobs), so a 300-player field projects in about a second
+on a few cores. Simulated rounds are paired with PROJECTION_ENGINE, 'greedy'
+by default: the blossom engine is far too slow to run thousands of times.
+Only one projection per section runs at a time in a process, so repeated
+requests cannot queue up work on the shared pool.
+"""
+import contextlib
+import os
+import random
+import threading
+from flask import current_app
+from . import pairing_logic
+from .jobs import get_runner
+from .tiebreaks import compute_tiebreaks
+from .tournament_state import RESULT_POINTS
+
+# Share of games drawn between equally rated players; fewer draws as the gap grows.
+DRAW_RATE = 0.25
+
+# Each worker gets this many chunks, so a slow chunk does not hold up the rest.
+CHUNKS_PER_WORKER = 2
+
+class ProjectionRunning(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def running(section_id):
+    """Marks a section's projection as running; raises ProjectionRunning if one already is."""
+    lock, active = current_app.extensions.setdefault('projections', (threading.Lock(), set()))
+    key = (current_app.config['DATABASE'], section_id)
+    with lock:
+        if key in active:
+            raise ProjectionRunning('A projection of this section is already running.')
+        active.add(key)
+    try:
+        yield
+    finally:
+        with lock:
+            active.discard(key)
+
+
+def _play(rating1, rating2, rng):
+    """A random result for player 1 against player 2 from the Elo expected score."""
+    expected = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+    draw = DRAW_RATE * (1 - abs(2 * expected - 1))
+    roll = rng.random()
+    if roll < expected - draw / 2:
+        return '1-0'
+    if roll < expected + draw / 2:
+        return '0.5-0.5'
+    return '0-1'
+
+
+def _final_order(state, order):
+    # Indices of the state's players from first to last place, as in the standings
+    tiebreaks = compute_tiebreaks(state, order)
+    keys = list(zip(state.points, *(tiebreaks[name] for name in order), state.ratings))
+    return sorted(range(len(state)), key=keys.__getitem__, reverse=True)
+
+
+def simulate(state, rounds_left, iterations, order, engine, seed):
+    """
+    Runs in a worker process: plays out the section iterations times and
+    returns rank counts as a flat list, counts[i * n + rank] for the player
+    at state index i finishing at 0-based rank.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)  # generate_first_round_pairs shuffles with the module RNG
+    n = len(state)
+    index = state.index
+    ratings = state.ratings
+    current_round = max(max(state.game_rounds, default=0), max((r for _, r, _ in state.bye_rounds), default=0))
+    counts = [0] * (n * n)
+
+    for _ in range(iterations):
+        points = list(state.points)
+        games = []
+        byes = []
+        round_number = current_round
+        pairings = state.pending
+        for step in range(rounds_left + 1):
+            for i, j in pairings:
+                if j is None:
+                    points[i] += 1.0
+                    byes.append((i, round_number, 1.0))
+                    continue
+                result = _play(ratings[i], ratings[j], rng)
+                score1, score2 = RESULT_POINTS[result]
+                points[i] += score1
+                points[j] += score2
+                games.append((i, j, result, round_number))
+            if step == rounds_left:
+                break
+            round_number += 1
+            simulated = state.extended(points, games, byes)
+            if round_number == 1:
+                pairs = pairing_logic.generate_first_round_pairs(simulated)
+            else:
+                pairs = pairing_logic.generate_swiss_pairs(simulated, engine=engine)
+            pairings = [(index[p1], index[p2] if p2 is not None else None) for p1, p2 in pairs]
+
+        for rank, i in enumerate(_final_order(state.extended(points, games, byes), order)):
+            counts[i * n + rank] += 1
+    return counts
+
+
+def project(state, rounds_left, iterations, order, engine, prizes):
+    """
+    Projects the final standings of a section from its TournamentState.
+    Returns a list of dicts (SrNo, name, rating, points, expected_rank,
+    ranks: {rank: probability}, prizes: probability of each of the first
+    prizes places, in_prizes: probability of any of them), ordered by
+    expected rank.
+    """
+    n = len(state)
+    if n == 0:
+        return []
+    runner = get_runner()
+    executor = runner.get_executor()
+    chunks = max(1, min(iterations, (runner.max_workers or os.cpu_count() or 1) * CHUNKS_PER_WORKER))
+    sizes = [iterations // chunks + (1 if c < iterations % chunks else 0) for c in range(chunks)]
+    seeds = [random.getrandbits(64) for _ in sizes]
+    try:
+        futures = [executor.submit(simulate, state, rounds_left, size, order, engine, seed)
+                   for size, seed in zip(sizes, seeds)]
+        results = [future.result() for future in futures]
+    except Exception as e:
+        runner.discard_broken_pool(e)
+        raise
+    counts = [sum(column) for column in zip(*results)]
+
+    projection = []
+    for i in range(n):
+        row = counts[i * n:(i + 1) * n]
+        projection.append({
+            'SrNo': state.sr_nos[i],
+            'name': state.names[i],
+            'rating': state.ratings[i],
+            'points': state.points[i],
+            'expected_rank': sum((rank + 1) * count for rank, count in enumerate(row)) / iterations,
+            'ranks': {rank + 1: count / iterations for rank, count in enumerate(row) if count},
+            'prizes': [count / iterations for count in row[:prizes]],
+            'in_prizes': sum(row[:prizes]) / iterations,
+        })
+    projection.sort(key=lambda p: p['expected_rank'])
+    return projection
@@ -0,0 +1,119 @@
+"""
+Schedules for closed events: round-robin, double round-robin and
+Scheveningen.
+
+These formats fix every game before the first round is played, so the whole
+schedule is built once when round 1 is paired and stored (db.schedule);
+later rounds are a lookup. Round-robins follow the FIDE Berger tables, which
+are generated once per field size and kept. Colours alternate as in the
+published tables, and the second cycle of a double round-robin repeats the
+first with colours reversed.
+
+Schedules are lists of (round_number, board, white SrNo, black SrNo), black
+None for a bye. A scheduled bye is a free round worth no points
+(FREE_ROUND_RESULT): in a round-robin every player sits out once in an odd
+field, so nobody should score for it.
+"""
+import functools
+import random
+
+# Section formats: key -> label. 'swiss' is paired round by round by
+# pairing_logic; the others are scheduled up front here.
+FORMATS = {
+    'swiss': 'Swiss',
+    'round_robin': 'Round Robin',
+    'double_round_robin': 'Double Round Robin',
+    'scheveningen': 'Scheveningen (two teams)',
+}
+
+# The result stored for a scheduled bye (see db.BYE_POINTS).
+FREE_ROUND_RESULT = '0-0'
+
+
+@functools.lru_cache(maxsize=None)
+def berger_table(n):
+    """
+    The Berger table for n pairing numbers (n even): a tuple of n - 1 rounds,
+    each a tuple of (white, black) pairing numbers from 1 to n, board 1 first.
+    """
+    if n < 2 or n % 2:
+        raise ValueError('Berger tables need an even number of players.')
+    m = n - 1
+    rounds = []
+    for r in range(1, n):
+        # Player p meets n; the others pair off around p (i + j = r + 1 mod m)
+        p = (r + 1) * (m + 1) // 2 % m or m
+        boards = [(n, p) if r % 2 == 0 else (p, n)]
+        for k in range(1, n // 2):
+            i = (p + k - 1) % m + 1
+            j = (p - k - 1) % m + 1
+            # Of two numbers, the one an odd step behind the other on the circle has white
+            boards.append((i, j) if (j - i) % m % 2 else (j, i))
+        rounds.append(tuple(boards))
+    return tuple(rounds)
+
+
+def round_robin_schedule(sr_nos, cycles=1):
+    """
+    Every player meets every other cycles times. sr_nos are in pairing-number
+    order; an odd field gets a bye where the missing number would play.
+    """
+    n = len(sr_nos) + len(sr_nos) % 2
+    numbered = {number: sr_no for number, sr_no in enumerate(sr_nos, 1)}
+    table = berger_table(n)
+    schedule = []
+    for cycle in range(cycles):
+        for r, boards in enumerate(table, 1):
+            round_number = cycle * len(table) + r
+            games = []
+            for white, black in boards:
+                if cycle % 2:
+                    white, black = black, white
+                white, black = numbered.get(white), numbered.get(black)
+                if white is None:
+                    white, black = black, None
+                games.append((white, black))
+            # Byes go last, as in a Swiss round
+            games.sort(key=lambda game: game[1] is None)
+            schedule.extend((round_number, board, white, black) for board, (white, black) in enumerate(games, 1))
+    return schedule
+
+
+def scheveningen_schedule(team_a, team_b):
+    """
+    Every member of team_a meets every member of team_b once. Board i of
+    round r pairs a[i] with b[(i + r) mod k]. Team B members move board each
+    round, so colours go by team: team_a has white on every board in odd
+    rounds and team_b in even ones, which is the only way every player
+    alternates colours.
+    """
+    k = len(team_a)
+    if k == 0 or k != len(team_b):
+        raise ValueError('Scheveningen needs two teams of the same size.')
+    schedule = []
+    for r in range(k):
+        for i in range(k):
+            a, b = team_a[i], team_b[(i + r) % k]
+            schedule.append((r + 1, i + 1, a, b) if r % 2 == 0 else (r + 1, i + 1, b, a))
+    return schedule
+
+
+def build_schedule(section_format, sr_nos):
+    """
+    The full schedule of a section in the given format, from its SrNos in
+    registration order. Round-robin pairing numbers are drawn by lot; for
+    Scheveningen the first half registered is one team and the second half
+    the other.
+    """
+    if len(sr_nos) < 2:
+        raise ValueError('You need at least two players.')
+    if section_format in ('round_robin', 'double_round_robin'):
+        numbers = list(sr_nos)
+        random.shuffle(numbers)
+        return round_robin_schedule(numbers, cycles=2 if section_format == 'double_round_robin' else 1)
+    if section_format == 'scheveningen':
+        if len(sr_nos) % 2:
+            raise ValueError('Scheveningen needs two teams of the same size.')
+        half = len(sr_nos) // 2
+        return scheveningen_schedule(sr_nos[:half], sr_nos[half:])
+    raise ValueError(f"'{section_format}' sections are not scheduled in advance.")
@@ -1,23 +1,45 @@
 import csv
 import io
-from flask import Blueprint, render_template, request, flash, redirect, url_for, make_response, session
+import sqlite3
+from flask import Blueprint, render_template, request, flash, redirect, url_for, session, current_app, Response, stream_with_context
 from . import db
 from . import pairing_logic
+from . import standings_cache
+from . import page_cache
+from . import events
+from . import jobs
+from . import projection
+from . import round_robin
+from . import trf
+from . import tiebreaks
 from chess_tournament.auth import login_required
 
 bp = Blueprint('main', __name__)
 
+# How many rejected rows of a roster import are listed back to the arbiter.
+MAX_REPORTED_IMPORT_ERRORS = 20
+
+# Archived tournaments per history page.
+HISTORY_PAGE_SIZE = 25
+
+# Upper bounds on what a projection request may ask for (about 5 s of
+# simulation for a 300-player field on one core).
+MAX_PROJECTION_ITERATIONS = 5000
+MAX_PROJECTION_ROUNDS = 12
+
 @bp.route('/', methods=('GET', 'POST'))
 @login_required 
 def index():
-    # 1. Check if Tournament Name is set in Session
-    tournament_name = session.get('tournament_name')
+    # 1. Check if the arbiter has an event open
+    section = _current_section()
 
-    # If NO name is set, we just render the template. 
-    if not tournament_name:
-        return render_template('index.html', tournament_name=None)
+    # If NOT, show the start screen with the events already running.
+    if section is None:
+        return render_template('index.html', tournament_name=None, tiebreak_choices=tiebreaks.TIEBREAKS,
+                               formats=round_robin.FORMATS, events=db.get_all_events())
 
-    # If Name IS set, proceed with Player Logic
+    # If one IS open, proceed with Player Logic for the current section
+    section_id = section['id']
     if request.method == 'POST':
         name = request.form['name']
         rating = request.form['rating']
@@ -27,110 +49,446 @@ def index():
         
         if error is None:
             try:
-                players_in_db = db.get_all_players_from_db()
-                if any(p['name'].lower() == name.lower() for p in players_in_db):
-                     raise ValueError(f"Player '{name}' is already registered.")
-                db.add_player_to_db(name, int(rating))
+                db.add_player_to_db(section_id, name, int(rating))
+                _players_changed(section_id)
                 flash('Player added successfully!', 'success')
+            except sqlite3.IntegrityError:
+                # The case-insensitive UNIQUE index on (section, name) rejects duplicates
+                flash(f"Player '{name}' is already registered.", 'error')
             except ValueError as e:
                 flash(str(e), 'error')
             return redirect(url_for('main.index'))
         flash(error, 'error')
     
-    # Calculate live standings
-    raw_players = db.get_all_players_from_db()
-    matches = db.get_all_finished_matches_from_db()
-    detailed_players = pairing_logic.calculate_standings_with_tiebreaks(raw_players, matches)
-    current_round = db.get_latest_round_number()
+    # Live standings are served from the incremental cache
+    order = _tiebreak_order(section)
+    detailed_players = standings_cache.get_standings(section_id, order)
+    current_round = db.get_latest_round_number(section_id)
     
-    return render_template('index.html', players=detailed_players, current_round=current_round, tournament_name=tournament_name)
+    return render_template('index.html', players=detailed_players, current_round=current_round,
+                           tournament_name=section['event_name'], section=section,
+                           sections=db.get_sections(section['event_id']), tiebreak_columns=_tiebreak_columns(order))
+
+def _current_section():
+    """The arbiter's current section (with its event's name and tiebreaks), or None."""
+    section_id = session.get('section_id')
+    return db.get_section(section_id) if section_id else None
+
+def _section_id():
+    """The section a request acts on: a 'section' argument, else the arbiter's current one."""
+    return request.values.get('section', type=int) or session.get('section_id')
+
+def _tiebreak_order(section):
+    return tuple(section['tiebreaks'].split(',')) if section['tiebreaks'] else tuple(current_app.config['TIEBREAK_ORDER'])
+
+def _tiebreak_columns(order):
+    # Buchholz is always shown; the configured tiebreaks follow in order
+    names = dict.fromkeys(('buchholz', *order))
+    return [(name, tiebreaks.TIEBREAKS[name][0]) for name in names]
 
 @bp.route('/set-name', methods=('POST',))
 @login_required 
 def set_tournament_name():
-    """Sets the tournament name in the session to start the flow."""
+    """Creates a new event with its sections and opens it for this arbiter."""
     name = request.form['tournament_name']
+    try:
+        order = tiebreaks.parse_tiebreak_order(request.form.getlist('tiebreak'))
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('main.index'))
+    section_names = list(dict.fromkeys(
+        section.strip() for section in request.form.get('sections', '').split(',') if section.strip()
+    )) or ['Open']
+    section_format = request.form.get('format', 'swiss')
+    if section_format not in round_robin.FORMATS:
+        flash(f"Unknown format '{section_format}'.", 'error')
+        return redirect(url_for('main.index'))
     if name:
-        session['tournament_name'] = name
-        # Also ensure DB is clear for a fresh start
-        db.reset_tournament_in_db() 
+        _, section_ids = db.create_event_in_db(name, section_names, order, section_format)
+        session['section_id'] = section_ids[0]
         flash(f'Tournament "{name}" started! Now add players.', 'success')
     return redirect(url_for('main.index'))
 
+@bp.route('/events/<int:event_id>')
+@login_required
+def open_event(event_id):
+    """Opens an event that is already running (e.g. one started by another arbiter)."""
+    sections = db.get_sections(event_id)
+    if not sections:
+        return 'Event not found.', 404
+    session['section_id'] = sections[0]['id']
+    return redirect(url_for('main.index'))
+
+@bp.route('/sections/<int:section_id>')
+@login_required
+def select_section(section_id):
+    section = db.get_section(section_id)
+    current = _current_section()
+    if section is None or current is None or section['event_id'] != current['event_id']:
+        return 'Section not found.', 404
+    session['section_id'] = section_id
+    return redirect(url_for('main.index'))
+
+@bp.route('/import-players', methods=('POST',))
+@login_required 
+def import_players():
+    """Registers a whole roster from an uploaded CSV (name,rating) or FIDE TRF file."""
+    section = _current_section()
+    if section is None:
+        return redirect(url_for('main.index'))
+    upload = request.files.get('players_file')
+    if not upload or not upload.filename:
+        flash('Choose a CSV or TRF file to import.', 'error')
+        return redirect(url_for('main.index'))
+
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig')
+    if upload.filename.lower().endswith(('.trf', '.txt')):
+        records = trf.iter_trf_players(stream)
+    else:
+        records = _iter_csv_players(stream)
+
+    errors = []
+    try:
+        added, duplicates = db.add_players_to_db(section['id'], _validated_players(records, errors))
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('main.index'))
+    errors = sorted(errors + duplicates)
+    if added:
+        _players_changed(section['id'])
+
+    flash(f'{added} players imported.', 'success')
+    for line_no, message in errors[:MAX_REPORTED_IMPORT_ERRORS]:
+        flash(f'Line {line_no}: {message}', 'error')
+    if len(errors) > MAX_REPORTED_IMPORT_ERRORS:
+        flash(f'...and {len(errors) - MAX_REPORTED_IMPORT_ERRORS} more rows were rejected.', 'error')
+    return redirect(url_for('main.index'))
+
+def _players_changed(section_id):
+    # The standings pages and API are cached under 'board' and list every player
+    standings_cache.invalidate(section_id)
+    page_cache.bump_version('board')
+
+def _iter_csv_players(stream):
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or not {'name', 'rating'} <= set(reader.fieldnames):
+        raise ValueError("CSV must have 'name' and 'rating' columns.")
+    for line_no, row in enumerate(reader, 2):
+        yield line_no, (row['name'] or '').strip(), (row['rating'] or '').strip()
+
+def _validated_players(records, errors):
+    """Yields valid (line_no, name, rating) rows and collects the rest in errors."""
+    for line_no, name, rating in records:
+        if not name:
+            errors.append((line_no, 'Name is required.'))
+        elif not rating:
+            errors.append((line_no, 'Rating is required.'))
+        elif not rating.isdigit():
+            errors.append((line_no, f"Invalid rating '{rating}'."))
+        else:
+            yield line_no, name, int(rating)
+
+@bp.route('/import-trf', methods=('POST',))
+@login_required
+def import_trf():
+    """Starts a new event from a FIDE TRF file: its players, every round and the results."""
+    upload = request.files.get('trf_file')
+    if not upload or not upload.filename:
+        flash('Choose a TRF file to import.', 'error')
+        return redirect(url_for('main.index'))
+    try:
+        name, players = trf.read_trf(io.TextIOWrapper(upload.stream, encoding='utf-8-sig'))
+        if not players:
+            raise ValueError('The file has no player records.')
+        rounds = trf.trf_rounds(players)
+        name = name or upload.filename.rsplit('.', 1)[0]
+        section_id, round_count = _import_trf_event(name, players, rounds)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('main.index'))
+    session['section_id'] = section_id
+    page_cache.bump_version('board')
+    flash(f'Tournament "{name}" imported: {len(players)} players, {round_count} rounds.', 'success')
+    return redirect(url_for('main.index'))
+
+def _import_trf_event(name, players, rounds):
+    # Built through the normal round and result functions, so points, byes
+    # and the journal are exactly as if the rounds had been played here.
+    # Returns (section_id, rounds imported); removes the event again on error.
+    event_id, (section_id,) = db.create_event_in_db(name, ['Open'], tuple(current_app.config['TIEBREAK_ORDER']))
+    try:
+        _, duplicates = db.add_players_to_db(section_id, ((p.line_no, p.name, p.rating) for p in players))
+        if duplicates:
+            line_no, message = duplicates[0]
+            raise ValueError(f'Line {line_no}: {message}')
+        sr_nos = {p['name'].lower(): p['SrNo'] for p in db.get_all_players_from_db(section_id)}
+        by_rank = {p.start_rank: sr_nos[p.name.lower()] for p in players}
+        round_count = 0
+        for round_number, games in enumerate(rounds, 1):
+            if not any(black for _, black, _ in games):
+                break  # rounds not paired yet
+            pairings = [(by_rank[white], by_rank[black] if black else None) for white, black, _ in games]
+            bye_results = {by_rank[white]: result for white, black, result in games if not black}
+            db.add_round_to_db(section_id, pairings, round_number, bye_results)
+            boards = {(p['player1_SrNo'], p['player2_SrNo']): p['Table_No']
+                      for p in db.get_current_pairings_from_db(section_id)}
+            # Double forfeits and concluded boards come back as 0-0
+            db.record_results_in_db(section_id, [
+                (boards[pairing], result) for pairing, (_, black, result) in zip(pairings, games)
+                if black and result != 'pending'
+            ], allowed=db.FINISHED_RESULTS)
+            round_count = round_number
+    except Exception:
+        db.delete_event_in_db(event_id)
+        raise
+    standings_cache.invalidate(section_id)
+    return section_id, round_count
+
 # --- PAIRING & RESULTS ROUTES ---
 @bp.route('/generate-pairings', methods=('POST',))
 @login_required 
 def generate_pairings():
-    if not db.are_all_results_in():
-        flash('Cannot generate next round. The current round must be concluded first.', 'error')
-        return redirect(url_for('main.view_pairings'))
-    players = db.get_all_players_from_db()
-    if len(players) < 2:
-        flash('You need at least two players.', 'error')
+    """Pairs the next round of every section of the event whose current round is concluded."""
+    section = _current_section()
+    if section is None:
         return redirect(url_for('main.index'))
-    latest_round = db.get_latest_round_number()
-    next_round = latest_round + 1
-    if next_round == 1:
-        pairings = pairing_logic.generate_first_round_pairs(players)
-    else:
-        history = db.get_match_history_from_db()
-        pairings = pairing_logic.generate_swiss_pairs(players, history)
-    db.add_pairings_to_db(pairings, next_round)
-    
-    # Auto-win byes
-    for p1, p2 in pairings:
-        if p2 is None:
-            db.update_player_score_in_db(p1, 1.0)
-            break
-            
-    flash(f'Round {next_round} pairings generated!', 'success')
+    sections = db.get_sections(section['event_id'])
+    ready = []
+    blocked = False
+    scheduled = 0
+    for s in sections:
+        label = f"{s['name']}: " if len(sections) > 1 else ''
+        if not db.are_all_results_in(s['id']):
+            flash(f'{label}Cannot generate next round. The current round must be concluded first.', 'error')
+            blocked = True
+            continue
+        round_number = db.get_latest_round_number(s['id']) + 1
+        if s['format'] != 'swiss':
+            # Closed sections look their round up in the schedule
+            try:
+                _pair_scheduled_round(s, round_number)
+            except ValueError as e:
+                flash(f'{label}{e}', 'error')
+            else:
+                flash(f'{label}Round {round_number} pairings generated!', 'success')
+                scheduled += 1
+            continue
+        state = db.get_tournament_state(s['id'])
+        if len(state) < 2:
+            flash(f'{label}You need at least two players.', 'error')
+            continue
+        ready.append((s['id'], state, round_number))
+    if not ready:
+        return redirect(url_for('main.view_pairings') if blocked or scheduled else url_for('main.index'))
+
+    engine = current_app.config['PAIRING_ENGINE']
+    runner = jobs.get_runner()
+    try:
+        if sum(len(state) for _, state, _ in ready) < current_app.config['PAIRING_JOB_THRESHOLD']:
+            job = runner.run_inline(ready, engine)
+        else:
+            # Sections are paired in parallel in the process pool
+            job = runner.submit(ready, engine)
+            flash('Next round pairings are being generated.', 'success')
+            return redirect(url_for('main.view_pairings', job=job.id))
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('main.view_pairings'))
+
+    for error in job.errors:
+        flash(error, 'error')
+    if len(ready) == 1 and not job.errors:
+        flash(f'Round {ready[0][2]} pairings generated!', 'success')
+    elif len(ready) > len(job.errors):
+        flash(f'Pairings generated for {len(ready) - len(job.errors)} sections.', 'success')
     return redirect(url_for('main.view_pairings'))
 
+def _pair_scheduled_round(section, round_number):
+    """Starts a scheduled section's next round; the whole schedule is built and stored with round 1."""
+    if db.get_scheduled_rounds(section['id']) == 0:
+        sr_nos = sorted(p['SrNo'] for p in db.get_all_players_from_db(section['id']))
+        db.save_schedule_in_db(section['id'], round_robin.build_schedule(section['format'], sr_nos))
+    pairings = db.get_scheduled_round(section['id'], round_number)
+    if not pairings:
+        raise ValueError('Every scheduled round has been played.')
+    # Sitting out a scheduled round is a free round, not a point
+    free_rounds = {p1: round_robin.FREE_ROUND_RESULT for p1, p2 in pairings if p2 is None}
+    jobs.commit_round(section['id'], pairings, round_number, free_rounds)
+
+@bp.route('/pairing-jobs/<job_id>')
+@login_required
+def pairing_job_status(job_id):
+    job = jobs.get_runner().get(job_id)
+    if job is None:
+        return {'error': 'Unknown job.'}, 404
+    return job.to_dict()
+
+@bp.route('/projection')
+@login_required
+@page_cache.cached_page('board')
+def project_standings():
+    """
+    Monte Carlo projection of a section's final standings: the chance of
+    every finishing rank and prize place, with rounds_left rounds still to
+    be paired after the current one.
+    """
+    section_id = _section_id()
+    section = db.get_section(section_id) if section_id else None
+    if section is None:
+        return {'error': 'Section not found.'}, 404
+    rounds_left = request.args.get('rounds_left', 1, type=int)
+    iterations = request.args.get('iterations', current_app.config['PROJECTION_ITERATIONS'], type=int)
+    prizes = request.args.get('prizes', 3, type=int)
+    if not 0 <= rounds_left <= MAX_PROJECTION_ROUNDS:
+        return {'error': f'rounds_left must be between 0 and {MAX_PROJECTION_ROUNDS}.'}, 400
+    if not 1 <= iterations <= MAX_PROJECTION_ITERATIONS:
+        return {'error': f'iterations must be between 1 and {MAX_PROJECTION_ITERATIONS}.'}, 400
+    if prizes < 1:
+        return {'error': 'prizes must be at least 1.'}, 400
+
+    try:
+        with projection.running(section['id']):
+            state = db.get_tournament_state(section['id'])
+            players = projection.project(state, rounds_left, iterations, _tiebreak_order(section),
+                                         current_app.config['PROJECTION_ENGINE'], prizes)
+    except projection.ProjectionRunning as e:
+        return {'error': str(e)}, 429
+    return {
+        'section': section['id'],
+        'rounds_left': rounds_left,
+        'iterations': iterations,
+        'prizes': prizes,
+        'players': players,
+    }
+
 @bp.route('/pairings')
+@page_cache.cached_page('board')
 def view_pairings():
-    pairings = db.get_current_pairings_from_db()
-    current_round = db.get_latest_round_number()
-    return render_template('pairings.html', pairings=pairings, current_round=current_round)
+    section_id = request.args.get('section', type=int)
+    if section_id is None:
+        # Public boards link to one section; the bare URL goes to the arbiter's current one
+        if not session.get('section_id'):
+            return redirect(url_for('main.index'))
+        return redirect(url_for('main.view_pairings', section=session['section_id'], **request.args))
+    section = db.get_section(section_id)
+    if section is None:
+        return 'Section not found.', 404
+    pairings = db.get_current_pairings_from_db(section_id)
+    current_round = db.get_latest_round_number(section_id)
+    return render_template('pairings.html', pairings=pairings, current_round=current_round, section=section,
+                           sections=db.get_sections(section['event_id']), pairing_job=request.args.get('job'))
+
+@bp.route('/pairings/stream')
+def pairings_stream():
+    """Server-sent events: new rounds and result changes for the pairings board."""
+    broker = events.get_broker()
+    subscriber = broker.subscribe()
+    response = Response(broker.stream(subscriber), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @bp.route('/record-result', methods=('POST',))
 @login_required 
 def record_result():
+    section_id = _section_id()
     table_no = int(request.form['table_no'])
     new_result = request.form['result']
-    player1_sr_no = int(request.form['player1_sr_no'])
-    
-    # Handle optional player 2
-    p2_val = request.form.get('player2_sr_no')
-    player2_sr_no = int(p2_val) if p2_val and p2_val != 'None' else None
-
-    # 1. Get Old Result
-    old_match = db.get_match_by_table_no(table_no)
-    old_result = old_match['result']
-
-    # 2. Revert Old Score Logic
-    if old_result == '1-0': db.update_player_score_in_db(player1_sr_no, -1.0)
-    elif old_result == '0-1' and player2_sr_no: db.update_player_score_in_db(player2_sr_no, -1.0)
-    elif old_result == '0.5-0.5':
-        db.update_player_score_in_db(player1_sr_no, -0.5)
-        if player2_sr_no: db.update_player_score_in_db(player2_sr_no, -0.5)
-
-    # 3. Apply New Result & Score
-    db.update_match_result_in_db(table_no, new_result)
-    
-    if new_result == '1-0': db.update_player_score_in_db(player1_sr_no, 1.0)
-    elif new_result == '0-1' and player2_sr_no: db.update_player_score_in_db(player2_sr_no, 1.0)
-    elif new_result == '0.5-0.5':
-        db.update_player_score_in_db(player1_sr_no, 0.5)
-        if player2_sr_no: db.update_player_score_in_db(player2_sr_no, 0.5)
-            
-    # 4. Return Response
-    return redirect(url_for('main.view_pairings'))
+
+    # Revert the old result and apply the new one in a single transaction
+    try:
+        changes, version = db.record_results_in_db(section_id, [(table_no, new_result)])
+    except ValueError as e:
+        return str(e), 400
+    _apply_result_changes(section_id, changes, version)
+
+    return redirect(url_for('main.view_pairings', section=section_id))
+
+@bp.route('/record-results', methods=('POST',))
+@login_required 
+def record_results():
+    """Records a whole round at once, from result_<table_no> form fields or an uploaded CSV."""
+    section_id = _section_id()
+    upload = request.files.get('results_file')
+    try:
+        if upload and upload.filename:
+            results = _read_results_csv(upload)
+        else:
+            results = [
+                (int(key[len('result_'):]), value)
+                for key, value in request.form.items()
+                if key.startswith('result_') and value
+            ]
+        changes, version = db.record_results_in_db(section_id, results)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('main.view_pairings', section=section_id))
+
+    _apply_result_changes(section_id, changes, version)
+    flash(f'{len(changes)} results recorded.', 'success')
+    return redirect(url_for('main.view_pairings', section=section_id))
+
+def _read_results_csv(upload):
+    """Reads (table_no, result) rows from a CSV with 'table_no' and 'result' columns."""
+    reader = csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig'))
+    if not reader.fieldnames or not {'table_no', 'result'} <= set(reader.fieldnames):
+        raise ValueError("CSV must have 'table_no' and 'result' columns.")
+    results = []
+    for line_no, row in enumerate(reader, 2):
+        table_no = (row.get('table_no') or '').strip()
+        if not table_no.isdigit():
+            raise ValueError(f"Line {line_no}: invalid table number '{table_no}'.")
+        result = (row.get('result') or '').strip()
+        if result not in db.VALID_RESULTS:
+            raise ValueError(f"Line {line_no}: invalid result '{result}'.")
+        results.append((int(table_no), result))
+    return results
+
+def _apply_result_changes(section_id, changes, version):
+    standings_cache.record_results(section_id, version, changes)
+    if changes:
+        page_cache.bump_version('board')
+        events.publish('results', section=section_id,
+                       boards=[[table_no, new_result] for table_no, _, _, _, new_result in changes])
+
+@bp.route('/undo-result', methods=('POST',))
+@login_required
+def undo_result():
+    """Reverts the section's latest result, as recorded in the journal."""
+    section_id = _section_id()
+    undone = db.undo_result_in_db(section_id)
+    if undone is None:
+        flash('Nothing to undo.', 'error')
+    else:
+        change, version = undone
+        _apply_result_changes(section_id, [change], version)
+        flash(f'Undid result on table {change[0]} ({change[3]} back to {change[4]}).', 'success')
+    return redirect(url_for('main.view_pairings', section=section_id))
+
+@bp.route('/redo-result', methods=('POST',))
+@login_required
+def redo_result():
+    section_id = _section_id()
+    redone = db.redo_result_in_db(section_id)
+    if redone is None:
+        flash('Nothing to redo.', 'error')
+    else:
+        change, version = redone
+        _apply_result_changes(section_id, [change], version)
+        flash(f'Redid result on table {change[0]} ({change[4]}).', 'success')
+    return redirect(url_for('main.view_pairings', section=section_id))
 
 @bp.route('/conclude-round', methods=('POST',))
 @login_required 
 def conclude_round():
-    current_round = db.get_latest_round_number()
-    db.conclude_round_in_db()
+    section_id = _section_id()
+    current_round = db.get_latest_round_number(section_id)
+    concluded_games, version = db.conclude_round_in_db(section_id)
+    standings_cache.record_concluded_games(section_id, version, concluded_games)
+    page_cache.bump_version('board')
+    if concluded_games:
+        events.publish('results', section=section_id,
+                       boards=[[table_no, '0-0'] for table_no, _, _ in concluded_games])
     flash(f'Round {current_round} has been concluded.', 'success')
     return redirect(url_for('main.index'))
 
@@ -139,60 +497,167 @@ def conclude_round():
 @bp.route('/end-tournament', methods=('POST',))
 @login_required 
 def end_tournament():
-    # Get name from Session (preferred) or form
-    tournament_name = session.get('tournament_name') or request.form.get('tournament_name')
-    
-    if not tournament_name:
+    section = _current_section()
+    if section is None:
         flash("Error: Tournament name missing.", "error")
         return redirect(url_for('main.index'))
 
-    # Calculate Final Standings
-    raw_players = db.get_all_players_from_db()
-    matches = db.get_all_finished_matches_from_db()
-    final_standings = pairing_logic.calculate_standings_with_tiebreaks(raw_players, matches)
-    
-    # Archive
-    tournament_id = db.save_tournament_to_history(tournament_name, final_standings)
+    # Archive every section as its own tournament, with its final standings
+    tournament_name = section['event_name']
+    order = _tiebreak_order(section)
+    sections = db.get_sections(section['event_id'])
+    tournament_ids = []
+    for s in sections:
+        state = db.get_tournament_state(s['id'])
+        final_standings = pairing_logic.calculate_standings_with_tiebreaks(state, order=order)
+        name = tournament_name if len(sections) == 1 else f"{tournament_name} - {s['name']}"
+        games = ((g['round_number'], g['Table_No'], g['player1_name'], g['player2_name'], g['result'])
+                 for g in db.iter_all_games(s['id']))
+        tournament_ids.append(db.save_tournament_to_history(name, final_standings, games))
+
+    # The live tables only hold running events
+    db.delete_event_in_db(section['event_id'])
+    standings_cache.discard([s['id'] for s in sections])
+    page_cache.bump_version('board')
+    page_cache.bump_version('history')
+    events.publish('reload')
     
     # Clear Session to allow new tournament
-    session.pop('tournament_name', None)
+    session.pop('section_id', None)
     
     flash(f'Tournament "{tournament_name}" archived successfully!', 'success')
-    return redirect(url_for('main.tournament_details', tournament_id=tournament_id, is_fresh=1))
+    if len(tournament_ids) > 1:
+        return redirect(url_for('main.history'))
+    return redirect(url_for('main.tournament_details', tournament_id=tournament_ids[0], is_fresh=1))
 
 @bp.route('/history')
+@page_cache.cached_page('history')
 def history():
-    tournaments = db.get_all_tournaments()
-    return render_template('history.html', tournaments=tournaments)
+    query = request.args.get('q', '').strip()
+    if query:
+        return render_template('history.html', tournaments=db.search_tournaments(query), query=query,
+                               players=db.search_player_names(query), total=db.count_tournaments())
+    before = request.args.get('before', type=int)
+    tournaments, next_before = db.get_tournaments_page(before, HISTORY_PAGE_SIZE)
+    return render_template('history.html', tournaments=tournaments, next_before=next_before,
+                           is_first_page=before is None, total=db.count_tournaments())
+
+@bp.route('/history/player')
+@page_cache.cached_page('history')
+def player_history():
+    """Every archived result of one player."""
+    name = request.args.get('name', '').strip()
+    results = db.get_player_history(name) if name else []
+    if not results:
+        return 'Player not found.', 404
+    return render_template('player_history.html', name=results[0]['name'], results=results)
 
 @bp.route('/history/<int:tournament_id>')
+@page_cache.cached_page()
 def tournament_details(tournament_id):
     is_fresh = request.args.get('is_fresh', 0)
     metadata = db.get_tournament_details(tournament_id)
+    if metadata is None:
+        return 'Tournament not found.', 404
     standings = db.get_tournament_standings(tournament_id)
     return render_template('tournament_details.html', tournament=metadata, standings=standings, is_fresh=is_fresh)
 
+# --- EXPORTS ---
+# CSV exports are streamed: rows come off the cursor in chunks and are written
+# out as they arrive, so memory stays flat whatever the tournament size.
+
+def _csv_lines(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+def _csv_response(filename, header, rows):
+    response = Response(stream_with_context(_csv_lines(header, rows)), mimetype='text/csv')
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
 @bp.route('/export_history/<int:tournament_id>')
 def export_history(tournament_id):
     metadata = db.get_tournament_details(tournament_id)
-    standings = db.get_tournament_standings(tournament_id)
-    
-    si = io.StringIO()
-    cw = csv.writer(si)
-    cw.writerow(['Rank', 'Name', 'Rating', 'Points', 'Tiebreak (Buchholz)'])
-    for p in standings:
-        cw.writerow([p['rank'], p['name'], p['rating'], p['points'], p['buchholz']])
-
-    output = make_response(si.getvalue())
+    if metadata is None:
+        return 'Tournament not found.', 404
+    rows = ((p['rank'], p['name'], p['rating'], p['points'], p['buchholz'])
+            for p in db.iter_tournament_standings(tournament_id))
     filename = f"{metadata['name'].replace(' ', '_')}_results.csv"
-    output.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    output.headers["Content-type"] = "text/csv"
-    return output
+    return _csv_response(filename, ['Rank', 'Name', 'Rating', 'Points', 'Tiebreak (Buchholz)'], rows)
+
+@bp.route('/export_history/<int:tournament_id>/games')
+def export_history_games(tournament_id):
+    metadata = db.get_tournament_details(tournament_id)
+    games = db.get_archived_games(tournament_id) if metadata is not None else None
+    if games is None:
+        return 'Tournament not found.', 404
+    rows = ((r, table, white, black or 'BYE', result) for r, table, white, black, result in games)
+    filename = f"{metadata['name'].replace(' ', '_')}_games.csv"
+    return _csv_response(filename, ['Round', 'Table', 'White', 'Black', 'Result'], rows)
+
+@bp.route('/export/pairings')
+def export_pairings():
+    section_id = _section_id()
+    if section_id is None:
+        return 'Section not found.', 404
+    rows = ((p['round_number'], board, p['player1_name'], p['player1_rating'],
+             p['player2_name'] or 'BYE', p['player2_rating'] or '', p['result'])
+            for board, p in enumerate(db.iter_current_pairings(section_id), 1))
+    return _csv_response('pairings.csv',
+                         ['Round', 'Board', 'White', 'White Rating', 'Black', 'Black Rating', 'Result'], rows)
+
+@bp.route('/export/games')
+def export_games():
+    section_id = _section_id()
+    if section_id is None:
+        return 'Section not found.', 404
+    rows = ((g['round_number'], g['Table_No'], g['player1_name'], g['player2_name'] or 'BYE', g['result'])
+            for g in db.iter_all_games(section_id))
+    return _csv_response('games.csv', ['Round', 'Table', 'White', 'Black', 'Result'], rows)
+
+@bp.route('/export/trf')
+def export_trf():
+    """The section's players, rounds and results as a FIDE TRF file, streamed line by line."""
+    section_id = _section_id()
+    section = db.get_section(section_id) if section_id else None
+    if section is None:
+        return 'Section not found.', 404
+    name = section['event_name']
+    if len(db.get_sections(section['event_id'])) > 1:
+        name = f"{name} - {section['name']}"
+    standings = standings_cache.get_standings(section['id'], _tiebreak_order(section))
+    players = [dict(p, rank=rank) for rank, p in enumerate(standings, 1)]
+    lines = trf.iter_trf_lines(name, players, db.iter_section_pairings(section['id']))
+    response = Response(stream_with_context(lines), mimetype='text/plain')
+    response.headers["Content-Disposition"] = f"attachment; filename={name.replace(' ', '_')}.trf"
+    return response
+
+@bp.route('/export/archive')
+def export_archive():
+    rows = ((s['tournament_id'], s['tournament_name'], s['date_concluded'], s['rank'],
+             s['name'], s['rating'], s['points'], s['buchholz'])
+            for s in db.iter_all_archived_standings())
+    return _csv_response('tournament_archive.csv',
+                         ['Tournament ID', 'Tournament', 'Concluded', 'Rank', 'Name', 'Rating', 'Points',
+                          'Tiebreak (Buchholz)'], rows)
 
 @bp.route('/reset-and-home')
 @login_required 
 def reset_and_home():
-    db.reset_tournament_in_db()
-    session.pop('tournament_name', None) # Clear session
+    section = _current_section()
+    if section is not None:
+        sections = db.get_sections(section['event_id'])
+        db.delete_event_in_db(section['event_id'])
+        standings_cache.discard([s['id'] for s in sections])
+        page_cache.bump_version('board')
+        events.publish('reload')
+    session.pop('section_id', None) # Clear session
     flash('Board cleared.', 'success')
-    return redirect(url_for('main.index'))
\ No newline at end of file
+    return redirect(url_for('main.index'))
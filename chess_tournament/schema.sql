@@ -9,27 +9,121 @@ CREATE TABLE user (
 -- 2. EXISTING: Drop existing game tables
 DROP TABLE IF EXISTS players;
 DROP TABLE IF EXISTS pairings;
+DROP TABLE IF EXISTS journal;
+DROP TABLE IF EXISTS snapshots;
+DROP TABLE IF EXISTS schedule;
+DROP TABLE IF EXISTS board_events;
+DROP TABLE IF EXISTS sections;
+DROP TABLE IF EXISTS events;
 DROP TABLE IF EXISTS tournaments;
 DROP TABLE IF EXISTS history_standings;
+DROP TABLE IF EXISTS tournament_games;
+DROP TABLE IF EXISTS tournaments_fts;
+DROP TABLE IF EXISTS history_standings_fts;
 
 -- 3. EXISTING: Active Tournament Tables
+-- Several events can run at once; each has one or more sections
+-- (Open, U1800, ...) that are paired independently.
+CREATE TABLE events(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    tiebreaks TEXT NOT NULL DEFAULT 'buchholz',
+    created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE sections(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    -- 'swiss', or a format scheduled up front (see round_robin.FORMATS)
+    format TEXT NOT NULL DEFAULT 'swiss',
+    -- Bumped by every write to the section's players or pairings
+    version INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (event_id, name),
+    FOREIGN KEY (event_id) REFERENCES events(id)
+);
+
 CREATE TABLE players(
     SrNo INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL UNIQUE,
+    section_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
     rating INTEGER NOT NULL,
-    points REAL DEFAULT 0.0
+    points REAL DEFAULT 0.0,
+    FOREIGN KEY (section_id) REFERENCES sections(id)
 );
 
 CREATE TABLE pairings(
     Table_No INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_id INTEGER NOT NULL,
     round_number INTEGER NOT NULL,
     player1_SrNo INTEGER NOT NULL,
     player2_SrNo INTEGER,
     result TEXT DEFAULT 'pending',
+    FOREIGN KEY (section_id) REFERENCES sections(id),
     FOREIGN KEY (player1_SrNo) REFERENCES players(SrNo),
     FOREIGN KEY (player2_SrNo) REFERENCES players(SrNo)
 );
 
+-- Indexes for the standings, current-round and history queries; every
+-- active-tournament query is scoped to one section.
+CREATE UNIQUE INDEX idx_players_name_nocase ON players(section_id, name COLLATE NOCASE);
+CREATE INDEX idx_players_standings ON players(section_id, points DESC, rating DESC, name);
+-- Covers the board queries (a round in Table_No order) and every section-wide read
+CREATE INDEX idx_pairings_round ON pairings(section_id, round_number, Table_No, player1_SrNo, player2_SrNo, result);
+CREATE INDEX idx_pairings_player1 ON pairings(player1_SrNo, player2_SrNo);
+CREATE INDEX idx_pairings_player2 ON pairings(player2_SrNo, player1_SrNo);
+
+-- Append-only journal of every change to a section's boards and scores,
+-- written in the same transaction as the change. players.points can be
+-- rebuilt from the latest snapshot plus the entries after it.
+CREATE TABLE journal(
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,  -- 'round', 'bye', 'result', 'undo' or 'redo'
+    round_number INTEGER,
+    table_no INTEGER,
+    player1_SrNo INTEGER,
+    player2_SrNo INTEGER,
+    old_result TEXT,
+    new_result TEXT,
+    ref INTEGER,  -- the 'result' entry an undo/redo applies to
+    undone INTEGER NOT NULL DEFAULT 0,
+    created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (section_id) REFERENCES sections(id)
+);
+
+-- Every player's points in a section as of journal entry seq, as JSON.
+CREATE TABLE snapshots(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    points TEXT NOT NULL,
+    created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (section_id) REFERENCES sections(id)
+);
+
+-- The full schedule of round-robin and Scheveningen sections, written once
+-- when round 1 is paired; each round is copied into pairings when it starts.
+CREATE TABLE schedule(
+    section_id INTEGER NOT NULL,
+    round_number INTEGER NOT NULL,
+    board INTEGER NOT NULL,
+    player1_SrNo INTEGER NOT NULL,
+    player2_SrNo INTEGER,
+    PRIMARY KEY (section_id, round_number, board),
+    FOREIGN KEY (section_id) REFERENCES sections(id)
+) WITHOUT ROWID;
+
+-- Recent events for the live pairings board, read by every worker process.
+CREATE TABLE board_events(
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+
+CREATE INDEX idx_journal_section ON journal(section_id, seq);
+CREATE INDEX idx_snapshots_section ON snapshots(section_id, seq);
+
 -- 4. EXISTING: History / Archiving Tables
 CREATE TABLE tournaments(
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -46,4 +140,41 @@ CREATE TABLE history_standings(
     points REAL NOT NULL,
     buchholz REAL NOT NULL,
     FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
-);
\ No newline at end of file
+);
+
+-- Every game of an archived tournament as one zlib-compressed JSON array of
+-- [round, table, white, black, result] rows, so the live tables stay small.
+CREATE TABLE tournament_games(
+    tournament_id INTEGER PRIMARY KEY,
+    games INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
+);
+
+CREATE INDEX idx_tournaments_date ON tournaments(date_concluded, id);
+CREATE INDEX idx_history_standings_rank ON history_standings(tournament_id, rank);
+CREATE INDEX idx_history_standings_name ON history_standings(name COLLATE NOCASE, tournament_id);
+
+-- Full-text search over tournament and player names, kept in sync by triggers
+CREATE VIRTUAL TABLE tournaments_fts USING fts5(name, content='tournaments', content_rowid='id');
+CREATE VIRTUAL TABLE history_standings_fts USING fts5(name, content='history_standings', content_rowid='id');
+CREATE TRIGGER tournaments_fts_insert AFTER INSERT ON tournaments BEGIN
+    INSERT INTO tournaments_fts(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER tournaments_fts_delete AFTER DELETE ON tournaments BEGIN
+    INSERT INTO tournaments_fts(tournaments_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER tournaments_fts_update AFTER UPDATE OF name ON tournaments BEGIN
+    INSERT INTO tournaments_fts(tournaments_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO tournaments_fts(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER history_standings_fts_insert AFTER INSERT ON history_standings BEGIN
+    INSERT INTO history_standings_fts(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER history_standings_fts_delete AFTER DELETE ON history_standings BEGIN
+    INSERT INTO history_standings_fts(history_standings_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER history_standings_fts_update AFTER UPDATE OF name ON history_standings BEGIN
+    INSERT INTO history_standings_fts(history_standings_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO history_standings_fts(rowid, name) VALUES (new.id, new.name);
+END;
@@ -0,0 +1,179 @@
+"""
+In-process cache of the live standings.
+
+The cache is built once from the database and then updated in place by the
+routes that change scores (results, byes, concluded rounds), touching only
+the players involved and their opponents' Buchholz. Anything that changes
+the player list invalidates it and the next read rebuilds it. There is one
+cache per section.
+
+Buchholz is maintained incrementally. Other tiebreak orders are computed
+from a TournamentState on the first read after a change and kept until the
+next one.
+
+The cache lives on the app object, so each worker process keeps its own.
+Each entry remembers the section version (db.get_section_version) it was
+built at, and every read compares it with the database: a change committed
+by another process makes the entry stale and it is rebuilt. In-place updates
+carry the version their write produced and are applied only on top of the
+version just before it, so an update is never counted twice or on top of a
+change it has not seen.
+"""
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from flask import current_app
+from . import db
+from .pairing_logic import RESULT_POINTS, calculate_standings_with_tiebreaks
+from .tiebreaks import DEFAULT_TIEBREAK_ORDER
+
+
+def _sort_key(p):
+    # Points (Desc) -> Buchholz (Desc) -> Rating (Desc), then SrNo for a stable order
+    return (-p['points'], -p['buchholz'], -p['rating'], p['SrNo'])
+
+
+class StandingsCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.players = None
+        self.opponents = defaultdict(list)
+        self.order = []
+        self.ranked = None
+
+    def load(self, version, players, matches):
+        self.version = version
+        self.players = {p['SrNo']: dict(p, buchholz=0.0) for p in players}
+        self.opponents = defaultdict(list)
+        for m in matches:
+            self._link(m['player1_SrNo'], m['player2_SrNo'])
+        self.order = sorted(_sort_key(p) for p in self.players.values())
+        self.ranked = None
+
+    def invalidate(self):
+        self.version = None
+        self.players = None
+        self.opponents = defaultdict(list)
+        self.order = []
+        self.ranked = None
+
+    def standings(self):
+        return [self.players[key[3]] for key in self.order]
+
+    def _link(self, p1, p2):
+        # Registers a finished game and adds each side's score to the other's Buchholz.
+        self.opponents[p1].append(p2)
+        self.opponents[p2].append(p1)
+        self.players[p1]['buchholz'] += self.players[p2]['points']
+        self.players[p2]['buchholz'] += self.players[p1]['points']
+
+    def _reorder(self, changed, update):
+        # Pull the affected entries out of the sorted order, apply the update
+        # and insert them back: O(changed * log n) comparisons.
+        self.ranked = None
+        for sr_no in changed:
+            key = _sort_key(self.players[sr_no])
+            del self.order[bisect_left(self.order, key)]
+        update()
+        for sr_no in changed:
+            insort(self.order, _sort_key(self.players[sr_no]))
+
+    def add_points(self, sr_no, points):
+        if not points:
+            return
+        changed = {sr_no, *self.opponents[sr_no]}
+
+        def update():
+            self.players[sr_no]['points'] += points
+            for opponent in self.opponents[sr_no]:
+                self.players[opponent]['buchholz'] += points
+
+        self._reorder(changed, update)
+
+    def add_game(self, p1, p2):
+        self._reorder({p1, p2}, lambda: self._link(p1, p2))
+
+
+def _get_cache(section_id):
+    caches = current_app.extensions.setdefault('standings_cache', {})
+    return caches.setdefault(section_id, StandingsCache())
+
+
+def get_standings(section_id, order=DEFAULT_TIEBREAK_ORDER):
+    """Returns a section's live standings, rebuilding the cache if it is stale or was invalidated."""
+    order = tuple(order)
+    cache = _get_cache(section_id)
+    version = db.get_section_version(section_id)
+    with cache.lock:
+        if cache.players is None or cache.version != version:
+            cache.load(*db.get_standings_data(section_id))
+        if order == DEFAULT_TIEBREAK_ORDER:
+            return cache.standings()
+        if cache.ranked is None or cache.ranked[0] != order:
+            state = db.get_tournament_state(section_id)
+            cache.ranked = (order, calculate_standings_with_tiebreaks(state, order=order))
+        return cache.ranked[1]
+
+
+def invalidate(section_id):
+    cache = _get_cache(section_id)
+    with cache.lock:
+        cache.invalidate()
+
+
+def _update(section_id, version, update):
+    # Applies the change that took the section to version, if the cache is
+    # exactly one change behind; otherwise the next read rebuilds it.
+    cache = _get_cache(section_id)
+    with cache.lock:
+        if cache.players is None or version is None or cache.version == version:
+            return  # not loaded, nothing written, or already rebuilt after the write
+        if cache.version != version - 1:
+            cache.invalidate()
+            return
+        update(cache)
+        cache.version = version
+
+
+def record_results(section_id, version, changes):
+    """Applies changed board results, (table_no, p1, p2, old_result, new_result), to the cached standings."""
+    def update(cache):
+        for _, player1_sr_no, player2_sr_no, old_result, new_result in changes:
+            if player2_sr_no is None or new_result == 'pending':
+                # Byes and undone games change who has played whom; rebuild
+                cache.invalidate()
+                return
+            old_p1, old_p2 = RESULT_POINTS.get(old_result, (0.0, 0.0))
+            new_p1, new_p2 = RESULT_POINTS.get(new_result, (0.0, 0.0))
+            if old_result == 'pending':
+                cache.add_game(player1_sr_no, player2_sr_no)
+            cache.add_points(player1_sr_no, new_p1 - old_p1)
+            cache.add_points(player2_sr_no, new_p2 - old_p2)
+
+    _update(section_id, version, update)
+
+
+def record_round(section_id, version, byes):
+    """A new round was added; byes are the (SrNo, points) awarded with it."""
+    def update(cache):
+        for sr_no, points in byes:
+            cache.add_points(sr_no, points)
+
+    _update(section_id, version, update)
+
+
+def record_concluded_games(section_id, version, games):
+    """Pending games closed as 0-0 now count as played for Buchholz."""
+    def update(cache):
+        for _, p1, p2 in games:
+            cache.add_game(p1, p2)
+
+    _update(section_id, version, update)
+
+
+def discard(section_ids):
+    """Drops the caches of deleted sections."""
+    caches = current_app.extensions.get('standings_cache', {})
+    for section_id in section_ids:
+        caches.pop(section_id, None)
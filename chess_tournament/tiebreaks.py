@@ -0,0 +1,136 @@
+"""
+Tiebreak engine over a TournamentState.
+
+Every tiebreak is computed for the whole field in a single pass over the
+state's finished-game columns (plus the byes for Progressive), so the cost
+grows with the number of games rather than players x games. Only the
+tiebreaks in the tournament's order are computed; Buchholz is always
+included because the standings page and the archive show it.
+"""
+from array import array
+
+DEFAULT_TIEBREAK_ORDER = ('buchholz',)
+
+
+def buchholz(state):
+    """Sum of the opponents' scores."""
+    return state.buchholz()
+
+
+def _opponent_extremes(state):
+    # Lowest and highest opponent score and the number of games, per player.
+    n = len(state)
+    points = state.points
+    lowest = [float('inf')] * n
+    highest = [float('-inf')] * n
+    games = [0] * n
+    for i, j in zip(state.ends1, state.ends2):
+        pi, pj = points[i], points[j]
+        if pj < lowest[i]:
+            lowest[i] = pj
+        if pj > highest[i]:
+            highest[i] = pj
+        if pi < lowest[j]:
+            lowest[j] = pi
+        if pi > highest[j]:
+            highest[j] = pi
+        games[i] += 1
+        games[j] += 1
+    return lowest, highest, games
+
+
+def buchholz_cut1(state):
+    """Buchholz without the lowest-scoring opponent."""
+    totals = state.buchholz()
+    lowest, _, games = _opponent_extremes(state)
+    return array('d', (total - lowest[i] if games[i] else total for i, total in enumerate(totals)))
+
+
+def median_buchholz(state):
+    """
+    Buchholz without the highest- and lowest-scoring opponents. Players with
+    fewer than three games keep their plain Buchholz.
+    """
+    totals = state.buchholz()
+    lowest, highest, games = _opponent_extremes(state)
+    return array('d', (total - lowest[i] - highest[i] if games[i] >= 3 else total
+                       for i, total in enumerate(totals)))
+
+
+def sonneborn_berger(state):
+    """Sum of the scores of beaten opponents plus half the scores of drawn ones."""
+    points = state.points
+    totals = [0.0] * len(state)
+    for i, j, score1, score2 in zip(state.ends1, state.ends2, state.scores1, state.scores2):
+        totals[i] += score1 * points[j]
+        totals[j] += score2 * points[i]
+    return array('d', totals)
+
+
+def progressive(state):
+    """
+    Sum of the running score after every round. A point scored in round r of
+    R counts R - r + 1 times; byes count with their points (1, 0.5 or 0)
+    in their round.
+    """
+    last_round = max(max(state.game_rounds, default=0),
+                     max((r for _, r, _ in state.bye_rounds), default=0))
+    totals = [0.0] * len(state)
+    for i, j, score1, score2, r in zip(state.ends1, state.ends2, state.scores1, state.scores2,
+                                       state.game_rounds):
+        weight = last_round - r + 1
+        totals[i] += score1 * weight
+        totals[j] += score2 * weight
+    for i, r, points in state.bye_rounds:
+        totals[i] += points * (last_round - r + 1)
+    return array('d', totals)
+
+
+def direct_encounter(state):
+    """
+    Points scored against players on the same score. Only applied when
+    every pair in that score group has met; otherwise the whole group gets 0.
+    """
+    points = state.points
+    totals = [0.0] * len(state)
+    met = {}
+    for i, j, score1, score2 in zip(state.ends1, state.ends2, state.scores1, state.scores2):
+        if points[i] == points[j]:
+            totals[i] += score1
+            totals[j] += score2
+            met.setdefault(points[i], set()).add((min(i, j), max(i, j)))
+
+    group_sizes = {}
+    for p in points:
+        group_sizes[p] = group_sizes.get(p, 0) + 1
+    for i, p in enumerate(points):
+        size = group_sizes[p]
+        if len(met.get(p, ())) < size * (size - 1) // 2:
+            totals[i] = 0.0
+    return array('d', totals)
+
+
+# name -> (column label, function)
+TIEBREAKS = {
+    'buchholz': ('Buchholz', buchholz),
+    'buchholz_cut1': ('Buchholz Cut-1', buchholz_cut1),
+    'median_buchholz': ('Median Buchholz', median_buchholz),
+    'sonneborn_berger': ('Sonneborn-Berger', sonneborn_berger),
+    'progressive': ('Progressive', progressive),
+    'direct_encounter': ('Direct Encounter', direct_encounter),
+}
+
+
+def parse_tiebreak_order(names):
+    """Validates a list of tiebreak names and returns it as a tuple."""
+    order = tuple(name for name in names if name)
+    for name in order:
+        if name not in TIEBREAKS:
+            raise ValueError(f"Unknown tiebreak '{name}'.")
+    return order or DEFAULT_TIEBREAK_ORDER
+
+
+def compute_tiebreaks(state, order=DEFAULT_TIEBREAK_ORDER):
+    """Returns {name: array of values in state index order} for Buchholz and every tiebreak in order."""
+    names = dict.fromkeys(('buchholz', *order))
+    return {name: TIEBREAKS[name][1](state) for name in names}
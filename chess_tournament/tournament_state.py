@@ -0,0 +1,194 @@
+"""
+Compact, array-backed tournament state for pairing and tiebreak computation.
+
+Players are addressed by integer index (0..n-1) and their columns are kept
+in typed arrays. Finished games are kept as flat edge columns (ends1/ends2
+with each side's score) and, on demand, as a CSR adjacency: the opponents
+of player i are opponents[offsets[i]:offsets[i + 1]], with the score i made
+in each game in the parallel game_scores array. Every pairing ever made
+(finished or not) goes into a set of int keys for rematch checks. A
+10,000-player field with a full Swiss history fits in a few MB.
+"""
+from array import array
+
+# Points awarded to (player 1, player 2) for each stored result.
+RESULT_POINTS = {
+    '1-0': (1.0, 0.0),
+    '0-1': (0.0, 1.0),
+    '0.5-0.5': (0.5, 0.5),
+    '0-0': (0.0, 0.0),
+}
+
+
+class TournamentState:
+    def __init__(self, players, games=(), byes=()):
+        """
+        players: rows with SrNo, rating, points and optionally name.
+        games: (player1_SrNo, player2_SrNo, result[, round_number]) for every
+        board with two players; 'pending' boards only count towards the
+        rematch index.
+        byes: SrNos, or (SrNo, round_number[, points]) tuples, of the byes
+        so far; points defaults to a full point. Only players with a
+        full-point bye are in self.byes, the set the pairing engines keep
+        from getting another one.
+        """
+        players = list(players)
+        has_names = bool(players) and 'name' in players[0].keys()
+        self.sr_nos = array('q', [p['SrNo'] for p in players])
+        self.ratings = array('l', [p['rating'] for p in players])
+        self.points = array('d', [p['points'] for p in players])
+        self.names = [p['name'] for p in players] if has_names else [None] * len(players)
+        self.index = {sr_no: i for i, sr_no in enumerate(self.sr_nos)}
+        n = len(self.sr_nos)
+
+        # One pass over the games into flat edge columns; the CSR adjacency
+        # and the rematch index are derived from them on first use.
+        index = self.index
+        get = index.get
+        edges = [(get(g[0]), get(g[1]), g[2], g[3] if len(g) > 3 else 0) for g in games]
+        edges = [edge for edge in edges if edge[0] is not None and edge[1] is not None]
+        self.pending = [(edge[0], edge[1]) for edge in edges if edge[2] == 'pending']
+        finished = [edge for edge in edges if edge[2] != 'pending']
+        scores = [RESULT_POINTS.get(edge[2], (0.0, 0.0)) for edge in finished]
+        self.ends1 = array('l', [edge[0] for edge in finished])
+        self.ends2 = array('l', [edge[1] for edge in finished])
+        self.scores1 = array('d', [score[0] for score in scores])
+        self.scores2 = array('d', [score[1] for score in scores])
+        self.game_rounds = array('l', [edge[3] for edge in finished])
+
+        self.bye_rounds = []
+        for bye in byes:
+            sr_no, round_number, points = (*bye, 1.0)[:3] if isinstance(bye, tuple) else (bye, 0, 1.0)
+            if sr_no in index:
+                self.bye_rounds.append((index[sr_no], round_number, points))
+        self.byes = {i for i, _, points in self.bye_rounds if points >= 1.0}
+        self._played = None
+        self._offsets = None
+
+    @classmethod
+    def from_rows(cls, players, matches=(), byes=()):
+        """Builds a state from db rows (players and pairings with a result column)."""
+        matches = list(matches)
+        keys = matches[0].keys() if matches else ()
+        if 'round_number' in keys:
+            games = [(m['player1_SrNo'], m['player2_SrNo'], m['result'], m['round_number'])
+                     for m in matches if m['player2_SrNo'] is not None]
+        elif 'result' in keys:
+            games = [(m['player1_SrNo'], m['player2_SrNo'], m['result'])
+                     for m in matches if m['player2_SrNo'] is not None]
+        else:
+            games = [(m['player1_SrNo'], m['player2_SrNo'], 'pending')
+                     for m in matches if m['player2_SrNo'] is not None]
+        return cls(players, games, byes)
+
+    def __len__(self):
+        return len(self.sr_nos)
+
+    def extended(self, points, games=(), byes=()):
+        """
+        A copy with new points (in index order) plus extra finished games
+        (i, j, result, round_number) and byes (i, round_number, points),
+        addressed by index. Pending pairings are dropped; pass their results in games.
+        The columns are copied rather than rebuilt from rows, so playing many
+        continuations on top of one history stays cheap.
+        """
+        byes = list(byes)
+        n = len(self.sr_nos)
+        scores = [RESULT_POINTS.get(g[2], (0.0, 0.0)) for g in games]
+        state = object.__new__(TournamentState)
+        state.sr_nos = self.sr_nos
+        state.ratings = self.ratings
+        state.names = self.names
+        state.index = self.index
+        state.points = array('d', points)
+        state.pending = []
+        state.ends1 = self.ends1 + array('l', [g[0] for g in games])
+        state.ends2 = self.ends2 + array('l', [g[1] for g in games])
+        state.scores1 = self.scores1 + array('d', [score[0] for score in scores])
+        state.scores2 = self.scores2 + array('d', [score[1] for score in scores])
+        state.game_rounds = self.game_rounds + array('l', [g[3] for g in games])
+        state.bye_rounds = self.bye_rounds + byes
+        state.byes = self.byes | {i for i, _, points in byes if points >= 1.0}
+        state._played = self.played | {g[0] * n + g[1] if g[0] < g[1] else g[1] * n + g[0] for g in games}
+        state._offsets = None
+        return state
+
+    @property
+    def played(self):
+        """Set of int keys (lo * n + hi) for every pairing made, finished or not."""
+        if self._played is None:
+            n = len(self.sr_nos)
+            pairs = list(zip(self.ends1, self.ends2)) + self.pending
+            self._played = {i * n + j if i < j else j * n + i for i, j in pairs}
+        return self._played
+
+    def has_played(self, i, j):
+        n = len(self.sr_nos)
+        return (i * n + j if i < j else j * n + i) in self.played
+
+    def _build_adjacency(self):
+        # Count degrees, turn them into row offsets, then fill the rows.
+        n = len(self.sr_nos)
+        degree = [0] * (n + 1)
+        for i in self.ends1:
+            degree[i + 1] += 1
+        for j in self.ends2:
+            degree[j + 1] += 1
+        for i in range(n):
+            degree[i + 1] += degree[i]
+        opponents = array('l', [0]) * degree[n]
+        game_scores = array('d', [0.0]) * degree[n]
+        cursor = degree[:n]
+        for i, j, score1, score2 in zip(self.ends1, self.ends2, self.scores1, self.scores2):
+            opponents[cursor[i]] = j
+            game_scores[cursor[i]] = score1
+            cursor[i] += 1
+            opponents[cursor[j]] = i
+            game_scores[cursor[j]] = score2
+            cursor[j] += 1
+        self._offsets = array('l', degree)
+        self._opponents = opponents
+        self._game_scores = game_scores
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            self._build_adjacency()
+        return self._offsets
+
+    @property
+    def opponents(self):
+        if self._offsets is None:
+            self._build_adjacency()
+        return self._opponents
+
+    @property
+    def game_scores(self):
+        if self._offsets is None:
+            self._build_adjacency()
+        return self._game_scores
+
+    def opponents_of(self, i):
+        return self.opponents[self.offsets[i]:self.offsets[i + 1]]
+
+    def history_pairs(self):
+        """The rematch index as a set of sorted (SrNo, SrNo) tuples."""
+        n = len(self.sr_nos)
+        return {(min(self.sr_nos[k // n], self.sr_nos[k % n]), max(self.sr_nos[k // n], self.sr_nos[k % n]))
+                for k in self.played}
+
+    def to_rows(self):
+        """Player rows as dicts, in index order."""
+        return [
+            {'SrNo': self.sr_nos[i], 'name': self.names[i], 'rating': self.ratings[i], 'points': self.points[i]}
+            for i in range(len(self.sr_nos))
+        ]
+
+    def buchholz(self):
+        """Sum of opponents' scores for every player, in one pass over the games."""
+        points = self.points
+        totals = [0.0] * len(self.sr_nos)
+        for i, j in zip(self.ends1, self.ends2):
+            totals[i] += points[j]
+            totals[j] += points[i]
+        return array('d', totals)
@@ -0,0 +1,253 @@
+"""
+Reading and writing FIDE TRF (Tournament Report File, TRF-16) data.
+
+TRF is a fixed-column text format: every line starts with a three-digit
+record code, and player records ('001') carry the starting rank, name,
+rating, points and final rank at fixed offsets, followed by one 10-column
+block per round (opponent's starting rank, colour, result code). Lines are
+consumed and produced one at a time, so callers can pass an open file or
+upload stream and stream the output, and a file is never held in memory as
+text; only the parsed players and games are.
+
+check_pairings replays a TRF round by round through the Swiss pairing
+engine and reports where its pairings differ from the file's.
+"""
+import time
+from collections import namedtuple
+from . import pairing_logic
+from .tournament_state import RESULT_POINTS, TournamentState
+
+PLAYER_RECORD = '001'
+TOURNAMENT_NAME_RECORD = '012'
+PLAYER_COUNT_RECORD = '062'
+ROUND_COUNT_RECORD = 'XXR'
+
+# 0-based [start, end) column ranges of the '001' player record fields.
+RANK_COLUMNS = (4, 8)
+NAME_COLUMNS = (14, 47)
+RATING_COLUMNS = (48, 52)
+POINTS_COLUMNS = (80, 84)
+FINAL_RANK_COLUMNS = (85, 89)
+
+# Round r's block starts at column FIRST_ROUND_COLUMN + (r - 1) * ROUND_WIDTH:
+# two blanks, the opponent (4), a blank, the colour, a blank, the result code.
+FIRST_ROUND_COLUMN = 89
+ROUND_WIDTH = 10
+
+# Result codes -> the player's score. Forfeits and unrated games count as
+# played games; 'H', 'F', 'U' and 'Z' are byes (half, full, pairing-allocated
+# and zero point). A blank result is a game not played yet.
+SCORES = {
+    '1': 1.0, '+': 1.0, 'W': 1.0,
+    '0': 0.0, '-': 0.0, 'L': 0.0,
+    '=': 0.5, 'D': 0.5,
+    'H': 0.5, 'F': 1.0, 'U': 1.0, 'Z': 0.0,
+}
+# Bye codes -> the result of the bye board the app stores for them (see
+# db.BYE_POINTS), and back. Zero-point byes cover absences too. Other codes
+# without an opponent cannot be imported.
+BYE_RESULTS = {'F': '1-0', 'U': '1-0', 'H': '0.5-0.5', 'Z': '0-0'}
+BYE_CODES = {'1-0': 'U', '0.5-0.5': 'H', '0-0': 'Z', 'pending': 'U'}
+
+# Our results from white's side -> (white's code, black's code).
+RESULT_CODES = {
+    '1-0': ('1', '0'),
+    '0-1': ('0', '1'),
+    '0.5-0.5': ('=', '='),
+    '0-0': ('-', '-'),
+    'pending': (' ', ' '),
+}
+_RESULTS_BY_SCORES = {scores: result for result, scores in RESULT_POINTS.items()}
+
+# rounds holds one (opponent start rank or None, colour 'w'/'b'/'-', result code) per round.
+TrfPlayer = namedtuple('TrfPlayer', 'line_no start_rank name rating points rank rounds')
+
+
+def _field(line, columns):
+    return line[columns[0]:columns[1]].strip()
+
+
+def iter_trf_players(lines):
+    """
+    Yields (line_no, name, rating) for every player record in a TRF file.
+    Values are returned as text for the caller to validate; a blank rating
+    (unrated player) is returned as '0'.
+    """
+    for line_no, line in enumerate(lines, 1):
+        if not line.startswith(PLAYER_RECORD):
+            continue
+        yield line_no, _field(line, NAME_COLUMNS), _field(line, RATING_COLUMNS) or '0'
+
+
+def _parse_rounds(line):
+    rounds = []
+    start = FIRST_ROUND_COLUMN
+    line = line.rstrip('\r\n')
+    while start + 2 < len(line):
+        block = line[start:start + ROUND_WIDTH].ljust(ROUND_WIDTH)
+        opponent, colour, code = block[2:6].strip(), block[7], block[9]
+        rounds.append((int(opponent) if opponent.isdigit() and int(opponent) else None, colour, code))
+        start += ROUND_WIDTH
+    return tuple(rounds)
+
+
+def read_trf(lines):
+    """
+    Parses a TRF file line by line. Returns (tournament name or None, a list
+    of TrfPlayer in starting-rank order). Raises ValueError on a malformed
+    player record.
+    """
+    name = None
+    players = []
+    for line_no, line in enumerate(lines, 1):
+        if line.startswith(TOURNAMENT_NAME_RECORD):
+            name = line[4:].strip() or None
+        if not line.startswith(PLAYER_RECORD):
+            continue
+        start_rank = _field(line, RANK_COLUMNS)
+        rating = _field(line, RATING_COLUMNS) or '0'
+        points = _field(line, POINTS_COLUMNS) or '0'
+        rank = _field(line, FINAL_RANK_COLUMNS)
+        try:
+            players.append(TrfPlayer(line_no, int(start_rank), _field(line, NAME_COLUMNS), int(rating),
+                                     float(points), int(rank) if rank else None, _parse_rounds(line)))
+        except ValueError:
+            raise ValueError(f'Line {line_no}: malformed player record.') from None
+    players.sort(key=lambda p: p.start_rank)
+    return name, players
+
+
+def trf_rounds(players):
+    """
+    The games of every round from parsed players, as lists of (white, black,
+    result) in starting ranks with our result strings ('pending' for games
+    not played yet). Byes are (player, None, bye result) as in BYE_RESULTS;
+    a blank code without an opponent is a round not paired yet. Each game is
+    listed on both players' lines and is taken once, from white's side (or
+    the lower starting rank when colours are missing). Raises ValueError on
+    any other code without an opponent, whose score the app cannot store.
+    """
+    by_rank = {p.start_rank: p for p in players}
+    count = max((len(p.rounds) for p in players), default=0)
+    rounds = []
+    for r in range(count):
+        games = []
+        for p in players:
+            if r >= len(p.rounds):
+                continue
+            opponent, colour, code = p.rounds[r]
+            if opponent is None:
+                if code in BYE_RESULTS:
+                    games.append((p.start_rank, None, BYE_RESULTS[code]))
+                elif code != ' ':
+                    raise ValueError(f"Line {p.line_no}: round {r + 1} result code '{code}' "
+                                     f"without an opponent is not supported.")
+                continue
+            other = by_rank.get(opponent)
+            if other is None:
+                raise ValueError(f'Line {p.line_no}: round {r + 1} opponent {opponent} is not in the file.')
+            if colour == 'b' or (colour != 'w' and p.start_rank > opponent):
+                continue
+            other_code = other.rounds[r][2] if r < len(other.rounds) else ' '
+            if code == ' ' or other_code == ' ':
+                result = 'pending'
+            else:
+                scores = (SCORES.get(code, 0.0), SCORES.get(other_code, 0.0))
+                result = _RESULTS_BY_SCORES.get(scores, '0-0')
+            games.append((p.start_rank, opponent, result))
+        rounds.append(games)
+    return rounds
+
+
+def _player_line(start_rank, name, rating, points, rank, blocks):
+    line = (f'{PLAYER_RECORD} {start_rank:>4} {"":<4} {name[:33]:<33} {rating or "":>4} {"":<3} {"":<11} '
+            f'{"":<10} {points:>4.1f} {rank or "":>4}')
+    for opponent, colour, code in blocks:
+        line += f'  {opponent or "0000":>4} {colour} {code}'
+    return line + '\n'
+
+
+def iter_trf_lines(name, players, games):
+    """
+    Yields a TRF file line by line. players are rows with SrNo, name, rating,
+    points and rank; games are (round_number, player1_SrNo, player2_SrNo,
+    result) in round order, player2 None for a bye (exported by its result
+    as in BYE_CODES; rounds a player sat out are 'Z'). Starting ranks follow
+    rating order, as FIDE prescribes.
+    """
+    players = sorted(players, key=lambda p: (-p['rating'], p['SrNo']))
+    start_ranks = {p['SrNo']: rank for rank, p in enumerate(players, 1)}
+    blocks = {sr_no: [] for sr_no in start_ranks}
+    last_round = 0
+    for round_number, p1, p2, result in games:
+        for sr_no in (p1, p2):
+            # Absent players get an empty block for the rounds they sat out
+            if sr_no is not None:
+                blocks[sr_no].extend([(None, '-', 'Z')] * (round_number - 1 - len(blocks[sr_no])))
+        if p2 is None:
+            blocks[p1].append((None, '-', BYE_CODES.get(result, 'U')))
+        else:
+            white_code, black_code = RESULT_CODES.get(result, (' ', ' '))
+            blocks[p1].append((start_ranks[p2], 'w', white_code))
+            blocks[p2].append((start_ranks[p1], 'b', black_code))
+        last_round = max(last_round, round_number)
+
+    yield f'{TOURNAMENT_NAME_RECORD} {name}\n'
+    yield f'{PLAYER_COUNT_RECORD} {len(players)}\n'
+    yield f'{ROUND_COUNT_RECORD} {last_round}\n'
+    for p in players:
+        player_blocks = blocks[p['SrNo']]
+        player_blocks.extend([(None, '-', 'Z')] * (last_round - len(player_blocks)))
+        yield _player_line(start_ranks[p['SrNo']], p['name'], p['rating'], p['points'], p['rank'], player_blocks)
+
+
+def check_pairings(players, engine='matching', first_round=2):
+    """
+    Replays a parsed TRF through generate_swiss_pairs: for every round from
+    first_round on, the players present in that round are paired from the
+    file's earlier rounds and the boards are compared with the file's,
+    ignoring colours. Returns a list of per-round dicts with the number of
+    boards, how many the engine reproduced, the pairing time, and the
+    boards only in the file (expected) or only in the engine's pairing
+    (actual). Round 1 is skipped by default: the app pairs it at random.
+    """
+    # Half- and zero-point byes were requested or absences, not paired
+    rounds = [[game for game in games if game[1] is not None or game[2] == '1-0']
+              for games in trf_rounds(players)]
+    ratings = {p.start_rank: p.rating for p in players}
+    names = {p.start_rank: p.name for p in players}
+    points = {p.start_rank: 0.0 for p in players}
+    history = []
+    byes = []
+    report = []
+    for r, games in enumerate(rounds, 1):
+        if r >= first_round:
+            present = {rank for game in games for rank in game[:2] if rank is not None}
+            state = TournamentState(
+                [{'SrNo': rank, 'name': names[rank], 'rating': ratings[rank], 'points': points[rank]}
+                 for rank in sorted(present)],
+                history, byes)
+            start = time.perf_counter()
+            pairings = pairing_logic.generate_swiss_pairs(state, engine=engine)
+            elapsed = time.perf_counter() - start
+            expected = {frozenset(game[:2]) for game in games}
+            actual = {frozenset(pair) for pair in pairings}
+            report.append({
+                'round': r,
+                'boards': len(expected),
+                'same': len(expected & actual),
+                'seconds': round(elapsed, 6),
+                'expected': sorted(sorted(board, key=lambda x: x or 0) for board in expected - actual),
+                'actual': sorted(sorted(board, key=lambda x: x or 0) for board in actual - expected),
+            })
+
+        for white, black, result in games:
+            if black is None:
+                byes.append((white, r))
+            else:
+                history.append((white, black, result, r))
+        # Points come from the codes, so half-point byes and forfeits count too
+        for p in players:
+            if r <= len(p.rounds):
+                points[p.start_rank] += SCORES.get(p.rounds[r - 1][2], 0.0)
+    return report
@@ -0,0 +1,25 @@
+import pytest
+from chess_tournament import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SECRET_KEY': 'test',
+        'DATABASE': str(tmp_path / 'tournament.sqlite'),
+    })
+    # Page-cache version files go with the temporary database
+    app.instance_path = str(tmp_path)
+    with app.app_context():
+        db.init_db()
+    yield app
+
+
+@pytest.fixture
+def client(app):
+    """A test client logged in as an arbiter."""
+    client = app.test_client()
+    client.post('/auth/register', data={'username': 'arbiter', 'password': 'secret'})
+    client.post('/auth/login', data={'username': 'arbiter', 'password': 'secret'})
+    return client
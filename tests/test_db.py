@@ -0,0 +1,105 @@
+import sqlite3
+import pytest
+from chess_tournament import create_app, db
+
+
+def _tables(app):
+    with app.app_context():
+        return {row[0] for row in db.get_db().execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _user_version(app):
+    with app.app_context():
+        return db.get_db().execute('PRAGMA user_version').fetchone()[0]
+
+
+def test_failed_migration_leaves_nothing_behind(app, monkeypatch):
+    version = _user_version(app)
+    broken = 'CREATE TABLE scratch(id INTEGER);\nCREATE TABLE scratch(id INTEGER);\n'
+    monkeypatch.setattr(db, 'MIGRATIONS', db.MIGRATIONS + [broken])
+    with app.app_context(), pytest.raises(sqlite3.OperationalError):
+        db.migrate_db()
+    assert 'scratch' not in _tables(app)
+    assert _user_version(app) == version
+
+    # Once fixed, the same migration applies cleanly
+    monkeypatch.setattr(db, 'MIGRATIONS', db.MIGRATIONS[:-1] + ['CREATE TABLE scratch(id INTEGER);'])
+    with app.app_context():
+        assert db.migrate_db() == 1
+    assert 'scratch' in _tables(app)
+    assert _user_version(app) == version + 1
+
+
+def test_migrations_keep_trigger_bodies_whole():
+    statements = list(db._statements(db.MIGRATIONS[5]))
+    triggers = [s for s in statements if s.startswith('CREATE TRIGGER')]
+    assert len(triggers) == 6
+    assert all(s.endswith('END;') for s in triggers)
+
+
+def _corrupt_points(app):
+    with app.app_context():
+        _, (section_id,) = db.create_event_in_db('Recovery Open', ['Open'], ('buchholz',))
+        for name in ('A', 'B'):
+            db.add_player_to_db(section_id, name, 1500)
+        db.add_round_to_db(section_id, [(1, 2)], 1)
+        db.record_results_in_db(section_id, [(db.get_current_pairings_from_db(section_id)[0]['Table_No'], '1-0')])
+        conn = db.get_db()
+        conn.execute('UPDATE players SET points = 7')
+        conn.commit()
+    return section_id
+
+
+def test_recovery_runs_at_startup_not_per_connection(app, monkeypatch):
+    section_id = _corrupt_points(app)
+    restarted = create_app({'TESTING': True, 'SECRET_KEY': 'test', 'DATABASE': app.config['DATABASE']})
+    with restarted.app_context():
+        assert [tuple(p) for p in db.get_all_players_from_db(section_id)] == [(1, 'A', 1500, 1.0),
+                                                                            (2, 'B', 1500, 0.0)]
+
+    def fail():
+        raise AssertionError('recover_db ran on a connection')
+
+    monkeypatch.setattr(db, 'recover_db', fail)
+    for _ in range(3):
+        with restarted.app_context():
+            db.get_db()
+
+
+def test_recovery_on_startup_can_be_turned_off(app):
+    section_id = _corrupt_points(app)
+    manual = create_app({'TESTING': True, 'SECRET_KEY': 'test', 'DATABASE': app.config['DATABASE'],
+                         'RECOVER_ON_STARTUP': False})
+    with manual.app_context():
+        assert {p['points'] for p in db.get_all_players_from_db(section_id)} == {7.0}
+    with manual.app_context():
+        result = manual.test_cli_runner().invoke(args=['recover-db'])
+    assert 'Corrected points in 1 section(s).' in result.output
+    with manual.app_context():
+        assert sorted(p['points'] for p in db.get_all_players_from_db(section_id)) == [0.0, 1.0]
+
+
+def _plans(conn, call):
+    """EXPLAIN QUERY PLAN details of every statement call runs."""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    return [[row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+            for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+
+
+@pytest.mark.parametrize('query', ['get_current_pairings_from_db', 'iter_current_pairings', 'iter_section_pairings'])
+def test_board_queries_use_the_round_index_without_sorting(app, query):
+    with app.app_context():
+        _, (section_id,) = db.create_event_in_db('Plan Open', ['Open'], ('buchholz',))
+        db.add_players_to_db(section_id, [(i, f'P{i}', 1500) for i in range(20)])
+        for round_number in (1, 2):
+            db.add_round_to_db(section_id, [(i, i + 1) for i in range(1, 20, 2)], round_number)
+        conn = db.get_db()
+        plans = _plans(conn, lambda: list(getattr(db, query)(section_id)))
+    details = [detail for plan in plans for detail in plan]
+    assert any('idx_pairings_round (section_id=?' in detail for detail in details), details
+    assert not any('TEMP B-TREE' in detail for detail in details), details
@@ -0,0 +1,67 @@
+import json
+import queue
+
+import pytest
+from chess_tournament import create_app, db, events
+
+
+@pytest.fixture
+def broker(app, monkeypatch):
+    """A second worker's broker on the same database, with its watcher stopped afterwards."""
+    monkeypatch.setattr(events, 'POLL_SECONDS', 0.01)
+    other = create_app({'TESTING': True, 'SECRET_KEY': 'test', 'DATABASE': app.config['DATABASE']})
+    other.instance_path = app.instance_path
+    with other.app_context():
+        broker = events.get_broker()
+    subscribers = []
+    yield broker, subscribers
+    for subscriber in subscribers:
+        broker.unsubscribe(subscriber)
+    watcher = broker.watcher
+    if watcher is not None:
+        watcher.join(1)
+
+
+def _next_event(subscriber):
+    event, data = subscriber.get(timeout=2).strip().split('\n')
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+def test_events_reach_subscribers_of_another_process(app, broker):
+    broker, subscribers = broker
+    with app.app_context():
+        events.publish('results', section=1, boards=[[1, '0-1']])  # before anyone listened
+    subscriber = broker.subscribe()
+    subscribers.append(subscriber)
+    with pytest.raises(queue.Empty):
+        subscriber.get(timeout=0.1)
+    with app.app_context():
+        events.publish('round', round=2, section=1)
+        events.publish('results', section=1, boards=[[5, '1-0']])
+    assert _next_event(subscriber) == ('round', {'round': 2, 'section': 1})
+    assert _next_event(subscriber) == ('results', {'section': 1, 'boards': [[5, '1-0']]})
+
+
+def test_pruned_events_make_the_board_reload(app, broker, monkeypatch):
+    broker, subscribers = broker
+    monkeypatch.setattr(db, 'BOARD_EVENTS_KEPT', 2)
+    subscriber = broker.subscribe()
+    subscribers.append(subscriber)
+    with app.app_context():
+        events.publish('round', round=1, section=1)
+    assert _next_event(subscriber)[1]['round'] == 1
+    with broker.lock:  # holds the watcher back while more events than are kept arrive
+        with app.app_context():
+            for round_number in range(2, 6):
+                events.publish('round', round=round_number, section=1)
+    assert _next_event(subscriber) == ('reload', {})
+    assert [_next_event(subscriber)[1]['round'] for _ in range(2)] == [4, 5]
+
+
+def test_watcher_stops_with_the_last_subscriber(broker):
+    broker, _ = broker
+    subscriber = broker.subscribe()
+    watcher = broker.watcher
+    broker.unsubscribe(subscriber)
+    watcher.join(1)
+    assert not watcher.is_alive() and broker.watcher is None
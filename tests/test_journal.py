@@ -0,0 +1,79 @@
+import random
+import pytest
+from chess_tournament import db
+
+
+@pytest.fixture
+def section(app):
+    """A section of ten players with round 1 paired; returns (section_id, table numbers)."""
+    with app.app_context():
+        _, (section_id,) = db.create_event_in_db('Journal Open', ['Open'], ('buchholz',))
+        db.add_players_to_db(section_id, [(i, f'Player {i}', 1500 + i) for i in range(10)])
+        sr_nos = [p['SrNo'] for p in db.get_all_players_from_db(section_id)]
+        db.add_round_to_db(section_id, list(zip(sr_nos[::2], sr_nos[1::2])), 1)
+        tables = [p['Table_No'] for p in db.get_current_pairings_from_db(section_id)]
+    return section_id, tables
+
+
+def _snapshot(app, section_id):
+    with app.app_context():
+        points = {p['SrNo']: p['points'] for p in db.get_all_players_from_db(section_id)}
+        results = {p['Table_No']: p['result'] for p in db.get_current_pairings_from_db(section_id)}
+    return points, results
+
+
+def test_undo_and_redo_restore_exact_scores(app, client, section):
+    section_id, tables = section
+    rng = random.Random(5)
+    states = [_snapshot(app, section_id)]
+    for _ in range(8):
+        client.post('/record-result', data={'section': section_id, 'table_no': rng.choice(tables),
+                                            'result': rng.choice(db.VALID_RESULTS)})
+        if _snapshot(app, section_id) != states[-1]:
+            states.append(_snapshot(app, section_id))
+
+    for expected in reversed(states[:-1]):
+        client.post('/undo-result', data={'section': section_id})
+        assert _snapshot(app, section_id) == expected
+    assert b'Nothing to undo.' in client.post('/undo-result', data={'section': section_id},
+                                              follow_redirects=True).data
+
+    for expected in states[1:]:
+        client.post('/redo-result', data={'section': section_id})
+        assert _snapshot(app, section_id) == expected
+    assert b'Nothing to redo.' in client.post('/redo-result', data={'section': section_id},
+                                              follow_redirects=True).data
+
+
+def test_new_result_clears_redo(app, client, section):
+    section_id, tables = section
+    client.post('/record-result', data={'section': section_id, 'table_no': tables[0], 'result': '1-0'})
+    client.post('/undo-result', data={'section': section_id})
+    client.post('/record-result', data={'section': section_id, 'table_no': tables[1], 'result': '0-1'})
+    response = client.post('/redo-result', data={'section': section_id}, follow_redirects=True)
+    assert b'Nothing to redo.' in response.data
+    points, results = _snapshot(app, section_id)
+    assert results[tables[0]] == 'pending' and results[tables[1]] == '0-1'
+    assert sum(points.values()) == 1.0
+
+
+def test_recovery_replays_the_journal_after_the_latest_snapshot(app, section, monkeypatch):
+    monkeypatch.setattr(db, 'SNAPSHOT_INTERVAL', 4)
+    section_id, tables = section
+    rng = random.Random(9)
+    with app.app_context():
+        for _ in range(30):
+            db.record_results_in_db(section_id, [(rng.choice(tables), rng.choice(db.VALID_RESULTS))])
+        db.undo_result_in_db(section_id)
+        expected = _snapshot(app, section_id)
+        conn = db.get_db()
+        assert conn.execute('SELECT COUNT(*) FROM snapshots WHERE section_id = ?',
+                            (section_id,)).fetchone()[0] == db.SNAPSHOTS_KEPT
+
+        # Scores and a board result drift away from the journal
+        conn.execute('UPDATE players SET points = points + 3 WHERE section_id = ?', (section_id,))
+        conn.execute("UPDATE pairings SET result = 'pending' WHERE Table_No = ?", (tables[0],))
+        conn.commit()
+        assert db.recover_section_in_db(section_id) == 10
+        assert db.recover_section_in_db(section_id) == 0
+    assert _snapshot(app, section_id) == expected
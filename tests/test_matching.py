@@ -0,0 +1,88 @@
+import itertools
+import random
+import pytest
+from chess_tournament import pairing_logic
+from chess_tournament.matching import max_weight_matching
+
+
+def _weight(edges, mate):
+    return sum(w for i, j, w in edges if mate[i] == j)
+
+
+def _brute_force(n, edges, maxcardinality):
+    """(cardinality, weight) of the best matching, trying every subset of edges."""
+    best = (0, 0)
+    for size in range(n // 2 + 1):
+        for subset in itertools.combinations(edges, size):
+            ends = [v for i, j, _ in subset for v in (i, j)]
+            if len(set(ends)) < len(ends):
+                continue
+            weight = sum(w for _, _, w in subset)
+            key = (size, weight) if maxcardinality else (0, weight)
+            best = max(best, key)
+    return best
+
+
+@pytest.mark.parametrize('maxcardinality', [False, True])
+def test_matching_agrees_with_brute_force(maxcardinality):
+    rng = random.Random(7)
+    for _ in range(150):
+        n = rng.randint(2, 8)
+        edges = [(i, j, rng.randint(-5, 30)) for i, j in itertools.combinations(range(n), 2) if rng.random() < 0.6]
+        if not edges:
+            continue
+        mate = max_weight_matching(edges, maxcardinality=maxcardinality)
+        mate += [-1] * (n - len(mate))
+        for v, m in enumerate(mate):
+            assert m == -1 or mate[m] == v
+        pairs = sum(1 for v, m in enumerate(mate) if m > v)
+        expected = _brute_force(n, edges, maxcardinality)
+        if maxcardinality:
+            assert (pairs, _weight(edges, mate)) == expected, edges
+        else:
+            assert _weight(edges, mate) == expected[1], edges
+
+
+def test_matching_handles_blossoms():
+    # Odd cycles force blossoms to be formed and expanded
+    edges = [(0, 1, 8), (0, 2, 9), (1, 2, 10), (2, 3, 7), (1, 4, 5), (3, 5, 6), (4, 5, 1)]
+    mate = max_weight_matching(edges, maxcardinality=True)
+    assert _weight(edges, mate) == _brute_force(6, edges, True)[1]
+
+
+def _play_round(players, pairings, rng):
+    points = {p['SrNo']: p for p in players}
+    for p1, p2 in pairings:
+        if p2 is None:
+            points[p1]['points'] += 1.0
+        else:
+            score = rng.choice((1.0, 0.5, 0.0))
+            points[p1]['points'] += score
+            points[p2]['points'] += 1.0 - score
+
+
+@pytest.mark.parametrize('engine', sorted(pairing_logic.PAIRING_ENGINES))
+def test_swiss_rounds_have_no_rematches(engine):
+    rng = random.Random(3)
+    for n in (7, 12, 25):
+        players = [{'SrNo': i, 'name': f'P{i}', 'rating': 1200 + 10 * i, 'points': 0.0} for i in range(1, n + 1)]
+        history = set()
+        byes = set()
+        for r in range(5):
+            if r == 0:
+                pairings = pairing_logic.generate_first_round_pairs(players)
+            else:
+                pairings = pairing_logic.generate_swiss_pairs(players, history, engine=engine, byes=byes)
+            seated = [sr_no for pair in pairings for sr_no in pair if sr_no is not None]
+            assert len(seated) == len(set(seated))
+            if engine == 'matching':
+                # The greedy fallback may leave players it cannot place unpaired
+                assert sorted(seated) == list(range(1, n + 1))
+                assert [p1 for p1, p2 in pairings if p2 is None and p1 in byes] == []
+            for p1, p2 in pairings:
+                if p2 is None:
+                    byes.add(p1)
+                else:
+                    assert tuple(sorted((p1, p2))) not in history
+                    history.add(tuple(sorted((p1, p2))))
+            _play_round(players, pairings, rng)
@@ -0,0 +1,37 @@
+import pytest
+from chess_tournament import create_app, db, metrics
+
+
+@pytest.fixture
+def metrics_app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SECRET_KEY': 'test',
+        'DATABASE': str(tmp_path / 'tournament.sqlite'),
+        'METRICS_ENABLED': True,
+    })
+    app.instance_path = str(tmp_path)
+    with app.app_context():
+        db.init_db()
+    metrics.registry.reset()
+    yield app
+    metrics.registry.reset()
+    metrics.enabled = False
+
+
+def _statements(statement):
+    return metrics.registry.histograms['chess_sql_duration_seconds'][statement].total
+
+
+def test_transactions_are_timed(metrics_app):
+    with metrics_app.app_context():
+        _, (section_id,) = db.create_event_in_db('Metrics Open', ['Open'], ('buchholz',))
+        db.add_players_to_db(section_id, [(i, f'Player {i}', 1500 + i) for i in range(4)])
+        db.add_round_to_db(section_id, [(1, 2), (3, 4)], 1)
+        commits = _statements('COMMIT')
+        db.record_results_in_db(section_id, [(1, '1-0'), (2, '0-1')])
+        assert _statements('COMMIT') == commits + 1
+        with pytest.raises(ValueError):
+            db.record_results_in_db(section_id, [(1, '0-1'), (99, '1-0')])
+        assert _statements('ROLLBACK') == 1
+    assert commits >= 3
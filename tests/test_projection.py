@@ -0,0 +1,43 @@
+import pytest
+from chess_tournament import db, jobs, projection
+
+
+@pytest.fixture
+def section_id(app):
+    app.config['PAIRING_WORKERS'] = 1
+    with app.app_context():
+        _, (section_id,) = db.create_event_in_db('Projection Open', ['Open'], ('buchholz',))
+        db.add_players_to_db(section_id, [(i, f'Player {i}', 1400 + 50 * i) for i in range(6)])
+        db.add_round_to_db(section_id, [(1, 2), (3, 4), (5, 6)], 1)
+    yield section_id
+    with app.app_context():
+        executor = jobs.get_runner().executor
+        if executor is not None:
+            executor.shutdown()
+
+
+def test_projection_needs_a_login(app, section_id):
+    response = app.test_client().get(f'/projection?section={section_id}')
+    assert response.status_code == 302
+    assert '/auth/login' in response.headers['Location']
+
+
+def test_projection_probabilities(client, section_id):
+    response = client.get(f'/projection?section={section_id}&iterations=40&rounds_left=1')
+    assert response.status_code == 200
+    players = response.get_json()['players']
+    assert len(players) == 6
+    assert sum(p['prizes'][0] for p in players) == pytest.approx(1.0)
+    assert all(sum(p['ranks'].values()) == pytest.approx(1.0) for p in players)
+
+
+@pytest.mark.parametrize('query', ['iterations=5001', 'rounds_left=13', 'iterations=0', 'prizes=0'])
+def test_projection_limits(client, section_id, query):
+    assert client.get(f'/projection?section={section_id}&{query}').status_code == 400
+
+
+def test_one_projection_per_section_at_a_time(app, client, section_id):
+    with app.app_context(), projection.running(section_id):
+        response = client.get(f'/projection?section={section_id}&iterations=10')
+    assert response.status_code == 429
+    assert 'already running' in response.get_json()['error']
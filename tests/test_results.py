@@ -0,0 +1,128 @@
+import io
+import threading
+import pytest
+from chess_tournament import db
+
+
+@pytest.fixture
+def section(app, client):
+    """A section with eight players and round 1 paired; returns (section_id, table numbers)."""
+    client.post('/set-name', data={'tournament_name': 'Results Open', 'tiebreak': 'buchholz'})
+    with app.app_context():
+        section_id = db.get_sections(db.get_all_events()[0]['id'])[0]['id']
+        for i in range(8):
+            db.add_player_to_db(section_id, f'Player {i}', 1500 + 10 * i)
+    client.post('/generate-pairings')
+    with app.app_context():
+        tables = [p['Table_No'] for p in db.get_current_pairings_from_db(section_id)]
+    return section_id, tables
+
+
+def _points(app, section_id):
+    with app.app_context():
+        return {p['SrNo']: p['points'] for p in db.get_all_players_from_db(section_id)}
+
+
+def _upload(client, section_id, text):
+    return client.post('/record-results', data={
+        'section': section_id,
+        'results_file': (io.BytesIO(text.encode()), 'results.csv'),
+    }, content_type='multipart/form-data', follow_redirects=True)
+
+
+def test_bulk_results_from_form_fields(app, client, section):
+    section_id, tables = section
+    form = {f'result_{table_no}': '1-0' for table_no in tables}
+    client.post('/record-results', data={'section': section_id, **form})
+    assert sorted(_points(app, section_id).values()) == [0.0] * 4 + [1.0] * 4
+    with app.app_context():
+        assert db.are_all_results_in(section_id)
+
+
+def test_bulk_results_from_csv(app, client, section):
+    section_id, tables = section
+    rows = '\n'.join(f'{table_no},0.5-0.5' for table_no in tables)
+    response = _upload(client, section_id, f'table_no,result\n{rows}\n')
+    assert b'4 results recorded.' in response.data
+    assert set(_points(app, section_id).values()) == {0.5}
+
+
+@pytest.mark.parametrize('text, message', [
+    ('table_no,result\n{t},1-0\n{t}\n', b'Line 3: invalid result'),
+    ('table_no,result\n{t},1-0\nabc,1-0\n', b'Line 3: invalid table number'),
+    ('table_no,result\n,1-0\n', b'Line 2: invalid table number'),
+    ('table,outcome\n{t},1-0\n', b'must have'),
+])
+def test_bad_csv_is_rejected_without_writing(app, client, section, text, message):
+    section_id, tables = section
+    response = _upload(client, section_id, text.format(t=tables[0]))
+    assert response.status_code == 200
+    assert message in response.data
+    assert set(_points(app, section_id).values()) == {0.0}
+
+
+def test_invalid_board_rolls_back_the_whole_round(app, client, section):
+    section_id, tables = section
+    client.post('/record-results', data={'section': section_id, f'result_{tables[0]}': '1-0',
+                                         f'result_{max(tables) + 100}': '1-0'})
+    assert set(_points(app, section_id).values()) == {0.0}
+
+
+def _write_during_commit(monkeypatch, app, write):
+    # Runs write in another thread (its own connection) while the caller's
+    # transaction is open, and lets it finish once the caller has committed.
+    threads = []
+    bump = db._bump_version
+
+    def bump_and_race(conn, section_id):
+        if not threads:
+            def run():
+                with app.app_context():
+                    write()
+            threads.append(threading.Thread(target=run))
+            threads[0].start()
+            threads[0].join(0.3)  # it cannot get in before the commit
+        return bump(conn, section_id)
+
+    monkeypatch.setattr(db, '_bump_version', bump_and_race)
+    return threads
+
+
+def test_concurrent_corrections_of_a_board_keep_scores_consistent(app, monkeypatch, section):
+    section_id, tables = section
+    threads = _write_during_commit(monkeypatch, app,
+                                   lambda: db.record_results_in_db(section_id, [(tables[0], '0-1')]))
+    with app.app_context():
+        db.record_results_in_db(section_id, [(tables[0], '1-0')])
+    threads[0].join()
+    with app.app_context():
+        board = next(p for p in db.get_current_pairings_from_db(section_id) if p['Table_No'] == tables[0])
+        assert board['result'] == '0-1'
+    points = _points(app, section_id)
+    assert (points[board['player1_SrNo']], points[board['player2_SrNo']]) == (0.0, 1.0)
+    assert sum(points.values()) == 1.0
+
+
+def test_conclude_round_keeps_a_result_recorded_meanwhile(app, monkeypatch, section):
+    section_id, tables = section
+    threads = _write_during_commit(monkeypatch, app, lambda: db.conclude_round_in_db(section_id))
+    with app.app_context():
+        db.record_results_in_db(section_id, [(tables[0], '1-0')])
+    threads[0].join()
+    with app.app_context():
+        # Recovery replays the journal, so it must agree with the boards
+        assert db.recover_section_in_db(section_id) == 0
+        results = {p['Table_No']: p['result'] for p in db.get_current_pairings_from_db(section_id)}
+        assert results == {table_no: '1-0' if table_no == tables[0] else '0-0' for table_no in tables}
+    assert sum(_points(app, section_id).values()) == 1.0
+
+
+def test_pending_boards_start_blank_and_blank_fields_are_skipped(app, client, section):
+    section_id, tables = section
+    page = client.get('/pairings', query_string={'section': section_id}).data.decode()
+    assert page.count('<option value="" selected>') == len(tables)
+    client.post('/record-results', data={'section': section_id, f'result_{tables[0]}': '1-0',
+                                         **{f'result_{table_no}': '' for table_no in tables[1:]}})
+    assert sum(_points(app, section_id).values()) == 1.0
+    with app.app_context():
+        assert not db.are_all_results_in(section_id)
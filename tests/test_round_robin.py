@@ -0,0 +1,55 @@
+from collections import defaultdict
+
+import pytest
+from chess_tournament import db, round_robin, standings_cache
+
+
+def _colours(schedule):
+    colours = defaultdict(list)
+    for _, _, white, black in sorted(schedule):
+        colours[white].append('w')
+        if black is not None:
+            colours[black].append('b')
+    return colours
+
+
+@pytest.mark.parametrize('k', [2, 3, 4, 5])
+def test_scheveningen_players_alternate_colours(k):
+    team_a, team_b = list(range(1, k + 1)), list(range(k + 1, 2 * k + 1))
+    schedule = round_robin.scheveningen_schedule(team_a, team_b)
+    assert {(w, b) if w in team_a else (b, w) for _, _, w, b in schedule} == \
+        {(a, b) for a in team_a for b in team_b}
+    for sr_no, colours in _colours(schedule).items():
+        assert len(colours) == k
+        assert all(c != d for c, d in zip(colours, colours[1:])), (sr_no, colours)
+
+
+@pytest.mark.parametrize('n', [4, 5, 8, 9])
+def test_round_robin_meets_everyone_once(n):
+    schedule = round_robin.round_robin_schedule(list(range(1, n + 1)))
+    games = [frozenset((w, b)) for _, _, w, b in schedule if b is not None]
+    assert len(games) == len(set(games)) == n * (n - 1) // 2
+    byes = [w for _, _, w, b in schedule if b is None]
+    assert sorted(byes) == (list(range(1, n + 1)) if n % 2 else [])
+
+
+def test_round_robin_free_round_scores_nothing(app, client):
+    client.post('/set-name', data={'tournament_name': 'Closed', 'tiebreak': 'buchholz', 'format': 'round_robin'})
+    with app.app_context():
+        section_id = db.get_sections(db.get_all_events()[0]['id'])[0]['id']
+        for i in range(5):
+            db.add_player_to_db(section_id, f'Player {i}', 2000 + 10 * i)
+        standings_cache.get_standings(section_id)  # loaded, so the round updates it in place
+    with client.session_transaction() as session:
+        session['section_id'] = section_id
+    client.post('/generate-pairings')
+    with app.app_context():
+        boards = db.get_current_pairings_from_db(section_id)
+        (bye,) = [b for b in boards if b['player2_SrNo'] is None]
+        assert bye['result'] == round_robin.FREE_ROUND_RESULT
+        assert {p['points'] for p in db.get_all_players_from_db(section_id)} == {0.0}
+        assert db.get_byes_from_db(section_id) == [(bye['player1_SrNo'], 1, 0.0)]
+        assert not db.get_tournament_state(section_id).byes
+        cached = {p['SrNo']: p['points'] for p in standings_cache.get_standings(section_id)}
+        assert cached[bye['player1_SrNo']] == 0.0
+        assert db.recover_section_in_db(section_id) == 0
@@ -0,0 +1,102 @@
+import io
+
+from chess_tournament import create_app, db, standings_cache
+
+
+def _second_app(app):
+    """Another app on the same database, standing in for a second worker process."""
+    other = create_app({'TESTING': True, 'SECRET_KEY': 'test', 'DATABASE': app.config['DATABASE']})
+    other.instance_path = app.instance_path
+    return other
+
+
+def _start_section(app, players=4):
+    with app.app_context():
+        _, (section_id,) = db.create_event_in_db('Cache Open', ['Open'], ('buchholz',))
+        for i in range(players):
+            db.add_player_to_db(section_id, f'Player {i}', 1500 + 100 * i)
+        sr_nos = [p['SrNo'] for p in db.get_all_players_from_db(section_id)]
+        db.add_round_to_db(section_id, list(zip(sr_nos[::2], sr_nos[1::2])), 1)
+        tables = [p['Table_No'] for p in db.get_current_pairings_from_db(section_id)]
+    return section_id, tables
+
+
+def _points(client, section_id):
+    items = client.get(f'/api/sections/{section_id}/standings').get_json()['items']
+    return {p['name']: p['points'] for p in items}
+
+
+def _fresh_points(app, section_id):
+    with app.app_context():
+        return {p['name']: p['points'] for p in db.get_all_players_from_db(section_id)}
+
+
+def test_results_in_one_process_reach_another(app, client):
+    section_id, tables = _start_section(app)
+    other = _second_app(app)
+    other_client = other.test_client()
+    other_client.post('/auth/login', data={'username': 'arbiter', 'password': 'secret'})
+    assert set(_points(other_client, section_id).values()) == {0.0}
+
+    client.post('/record-result', data={'section': section_id, 'table_no': tables[0], 'result': '1-0'})
+    assert _points(other_client, section_id) == _fresh_points(app, section_id)
+    assert sum(_points(other_client, section_id).values()) == 1.0
+
+    # An undo in the other process reaches the first one
+    other_client.post('/undo-result', data={'section': section_id})
+    assert set(_points(client, section_id).values()) == {0.0}
+
+
+def test_update_after_a_rebuild_is_not_counted_twice(app):
+    section_id, tables = _start_section(app)
+    with app.app_context():
+        standings_cache.get_standings(section_id)
+        changes, version = db.record_results_in_db(section_id, [(tables[0], '1-0'), (tables[1], '0.5-0.5')])
+        # A read lands between the commit and the in-place update and rebuilds the entry
+        standings_cache.get_standings(section_id)
+        standings_cache.record_results(section_id, version, changes)
+        cached = {p['name']: p['points'] for p in standings_cache.get_standings(section_id)}
+    assert cached == _fresh_points(app, section_id)
+
+
+def test_in_place_updates_match_a_rebuild(app, client):
+    section_id, tables = _start_section(app, players=6)
+    with app.app_context():
+        standings_cache.get_standings(section_id)
+    for table_no, result in ((tables[0], '1-0'), (tables[1], '0-1'), (tables[0], '0.5-0.5'), (tables[2], '1-0')):
+        client.post('/record-result', data={'section': section_id, 'table_no': table_no, 'result': result})
+    with client.session_transaction() as session:
+        session['section_id'] = section_id
+    client.post('/generate-pairings')
+    with app.app_context():
+        assert db.get_latest_round_number(section_id) == 2
+        cached = [(p['SrNo'], p['points'], p['buchholz']) for p in standings_cache.get_standings(section_id)]
+        standings_cache.invalidate(section_id)
+        rebuilt = [(p['SrNo'], p['points'], p['buchholz']) for p in standings_cache.get_standings(section_id)]
+    assert cached == rebuilt
+
+
+def test_other_tiebreak_orders_follow_results_from_another_process(app):
+    section_id, tables = _start_section(app)
+    order = ('sonneborn_berger', 'buchholz')
+    with app.app_context():
+        assert {p['points'] for p in standings_cache.get_standings(section_id, order)} == {0.0}
+    with _second_app(app).app_context():
+        db.record_results_in_db(section_id, [(tables[0], '1-0')])
+    with app.app_context():
+        ranked = {p['name']: p['points'] for p in standings_cache.get_standings(section_id, order)}
+    assert ranked == _fresh_points(app, section_id)
+
+
+def test_new_players_reach_cached_standings(app, client):
+    with app.app_context():
+        _, (section_id,) = db.create_event_in_db('Late Entries', ['Open'], ('buchholz',))
+    assert _points(client, section_id) == {}
+    with client.session_transaction() as session:
+        session['section_id'] = section_id
+    # Followed, so the flash messages are shown and the next request is cacheable
+    client.post('/', data={'name': 'First', 'rating': '1500'}, follow_redirects=True)
+    assert list(_points(client, section_id)) == ['First']
+    client.post('/import-players', data={'players_file': (io.BytesIO(b'name,rating\nSecond,1600\n'), 'p.csv')},
+                content_type='multipart/form-data', follow_redirects=True)
+    assert sorted(_points(client, section_id)) == ['First', 'Second']
@@ -0,0 +1,100 @@
+import html
+import io
+import random
+
+import pytest
+from chess_tournament import db, tiebreaks, trf
+
+
+def _import(client, text):
+    return client.post('/import-trf', data={'trf_file': (io.BytesIO(text.encode()), 'event.trf')},
+                       content_type='multipart/form-data', follow_redirects=True)
+
+
+def _latest_section(app):
+    with app.app_context():
+        return db.get_db().execute('SELECT MAX(id) FROM sections').fetchone()[0]
+
+
+def _points(app, section_id):
+    with app.app_context():
+        return {p['name']: p['points'] for p in db.get_all_players_from_db(section_id)}
+
+
+def _trf(rounds):
+    # A TRF of four players from (SrNo, round, opponent or None, result) games
+    players = [{'SrNo': i, 'name': f'Player {i}', 'rating': 2000 - 10 * i, 'points': 0.0, 'rank': None}
+               for i in range(1, 5)]
+    return ''.join(trf.iter_trf_lines('Byes Open', players, rounds))
+
+
+def test_export_and_import_round_trip(app, client):
+    client.post('/set-name', data={'tournament_name': 'Round Trip', 'tiebreak': 'buchholz'})
+    section_id = _latest_section(app)
+    with app.app_context():
+        for i in range(7):
+            db.add_player_to_db(section_id, f'Player {i}', 1500 + 25 * i)
+    rng = random.Random(3)
+    for round_number in range(1, 5):
+        client.post('/generate-pairings')
+        with app.app_context():
+            boards = [p['Table_No'] for p in db.get_current_pairings_from_db(section_id) if p['player2_SrNo']]
+            # The last round is concluded with boards still open, which exports them as double forfeits
+            db.record_results_in_db(section_id, [
+                (table_no, rng.choice(db.VALID_RESULTS)) for table_no in boards[:1 if round_number == 4 else None]
+            ])
+    client.post('/conclude-round', data={'section': section_id})
+    with app.app_context():
+        assert db.are_all_results_in(section_id)
+    text = client.get('/export/trf', query_string={'section': section_id}).data.decode()
+    assert ' w -' in text and ' b -' in text
+
+    response = _import(client, text)
+    assert b'imported: 7 players, 4 rounds' in response.data
+    imported = _latest_section(app)
+    assert imported != section_id
+    assert _points(app, imported) == _points(app, section_id)
+    with app.app_context():
+        assert db.recover_section_in_db(imported) == 0
+    exported = client.get('/export/trf', query_string={'section': imported}).data.decode()
+    assert exported == text
+
+
+def test_half_and_zero_point_byes_are_scored(app, client):
+    exported_text = _trf([
+        (1, 1, 2, '1-0'), (1, 3, None, '0.5-0.5'), (1, 4, None, '0-0'),
+        (2, 1, 3, '0.5-0.5'), (2, 2, None, '1-0'), (2, 4, None, '0-0'),
+    ])
+    text = exported_text.replace('0000 - U', '0000 - F')
+    assert '0000 - H' in text and '0000 - Z' in text and '0000 - F' in text
+
+    response = _import(client, text)
+    assert b'imported: 4 players, 2 rounds' in response.data
+    section_id = _latest_section(app)
+    assert _points(app, section_id) == {'Player 1': 1.5, 'Player 2': 1.0, 'Player 3': 1.0, 'Player 4': 0.0}
+    with app.app_context():
+        byes = db.get_db().execute(
+            "SELECT new_result FROM journal WHERE section_id = ? AND kind = 'bye'", (section_id,)
+        ).fetchall()
+        assert sorted(row['new_result'] for row in byes) == ['0-0', '0-0', '0.5-0.5', '1-0']
+        assert sorted(db.get_byes_from_db(section_id)) == [(2, 2, 1.0), (3, 1, 0.5), (4, 1, 0.0), (4, 2, 0.0)]
+        state = db.get_tournament_state(section_id)
+        assert state.byes == {state.index[2]}
+        # Running scores after rounds 1 and 2: the half-point bye counts twice
+        progressive = tiebreaks.progressive(state)
+        assert [progressive[state.index[sr_no]] for sr_no in (1, 2, 3, 4)] == [2.5, 1.0, 1.5, 0.0]
+        assert db.recover_section_in_db(section_id) == 0
+    exported = client.get('/export/trf', query_string={'section': section_id}).data.decode()
+    # Full-point byes are written back as U
+    assert [line[trf.FIRST_ROUND_COLUMN:] for line in exported.splitlines()[3:]] == \
+        [line[trf.FIRST_ROUND_COLUMN:] for line in exported_text.splitlines()[3:]]
+
+
+@pytest.mark.parametrize('code', ['+', '1', '='])
+def test_unsupported_bye_code_is_rejected(app, client, code):
+    text = _trf([(1, 1, 2, '1-0'), (1, 3, 4, '1-0'), (2, 1, 3, '1-0'), (2, 2, None, '1-0')])
+    text = text.replace('0000 - U', f'0000 - {code}')
+    response = _import(client, text)
+    assert f"round 2 result code '{code}' without an opponent is not supported" in html.unescape(response.text)
+    with app.app_context():
+        assert db.get_db().execute('SELECT COUNT(*) FROM events').fetchone()[0] == 0